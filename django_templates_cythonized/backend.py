@@ -1,93 +1,314 @@
+import hashlib
+import logging
+import os
+import sys
 import threading
+import weakref
+from collections import OrderedDict
+
+import cython
 
 from django.conf import settings
+from django.core.cache import cache as default_cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
 from django.forms.renderers import BaseRenderer, EngineMixin
-from django.template import TemplateDoesNotExist
+from django.template import TemplateDoesNotExist, TemplateSyntaxError
 from django.template.backends.base import BaseEngine
 from django.template.backends.django import DjangoTemplates, reraise
 
-from .context import Context, make_context
+from cython.cimports.django_templates_cythonized.context import Context
+
+from .base import UNKNOWN_SOURCE
+from .context import make_context
 from .engine import Engine
 
-_form_ctx_local = threading.local()
+logger = logging.getLogger("django.template")
+
+# Per-thread free list of Contexts reused by _Template.render for request-less
+# renders and by CythonizedFormRenderer.render.
+_render_ctx_local = threading.local()
+
+# Upper bound on backend-level cached template wrappers. Keeps long-lived
+# processes that render many dynamic template names from growing unbounded.
+TEMPLATE_CACHE_SIZE = 2048
+
+# Context key that opts a request-less render into whole-output caching. The
+# value is the cache key, or a (key, timeout) tuple. Stored keys are
+# namespaced per template (see _Template._fragment_key).
+FRAGMENT_CACHE_KEY = "_fragment_cache"
+FRAGMENT_CACHE_PREFIX = "django_templates_cythonized.fragment"
 
 
 class CythonizedTemplates(DjangoTemplates):
     """Drop-in replacement for DjangoTemplates that uses cythonized internals."""
 
     def __init__(self, params):
-        params = params.copy()
-        options = params.pop("OPTIONS").copy()
+        options = dict(params["OPTIONS"])
         options.setdefault("autoescape", True)
         options.setdefault("debug", settings.DEBUG)
         options.setdefault("file_charset", "utf-8")
         libraries = options.get("libraries", {})
         options["libraries"] = self.get_templatetag_libraries(libraries)
-        # Call BaseEngine.__init__ (skip DjangoTemplates.__init__)
-        BaseEngine.__init__(self, params)
+        # Call BaseEngine.__init__ (skip DjangoTemplates.__init__). It copies
+        # params itself, so only OPTIONS needs filtering out here.
+        BaseEngine.__init__(self, {key: value for key, value in params.items() if key != "OPTIONS"})
         # Use OUR Engine instead of django.template.engine.Engine
         self.engine = Engine(self.dirs, self.app_dirs, **options)
-        self._template_cache = {}
+        self.autoescape = self.engine.autoescape
+        self._template_cache = OrderedDict()
+        self._template_cache_lock = threading.Lock()
+        # Wrappers evicted from the LRU but still referenced elsewhere (e.g. by
+        # an unrendered TemplateResponse) are found here instead of rebuilt.
+        self._template_refs = weakref.WeakValueDictionary()
+        self._engine_get_template = self.engine.get_template
+
+    def get_templatetag_libraries(self, custom_libraries):
+        libraries = super().get_templatetag_libraries(custom_libraries)
+        # Interned names let {% load %} lookups in parser.libraries compare by
+        # identity once the probe lands on the right slot.
+        return {sys.intern(name): path for name, path in libraries.items()}
 
     def from_string(self, template_code):
         return _Template(self.engine.from_string(template_code), self)
 
     def get_template(self, template_name):
-        cached = self._template_cache.get(template_name)
-        if cached is not None:
-            return cached
+        cache = self._template_cache
+        # Hit path: one hash probe plus an O(1) recency bump. A concurrent
+        # eviction between the two raises KeyError and falls through to a miss.
         try:
-            result = _Template(self.engine.get_template(template_name), self)
-        except TemplateDoesNotExist as exc:
-            reraise(exc, self)
-        self._template_cache[template_name] = result
+            result = cache[template_name]
+            cache.move_to_end(template_name)
+            return result
+        except KeyError:
+            pass
+        result = self._template_refs.get(template_name)
+        if result is None:
+            try:
+                result = _Template(self._engine_get_template(template_name), self)
+            except TemplateDoesNotExist as exc:
+                reraise(exc, self)
+        # Interned keys let later lookups with literal names (already interned
+        # by the compiler) match by identity. Done on the miss path only so
+        # hits don't pay for the intern-table probe.
+        if type(template_name) is str:
+            template_name = sys.intern(template_name)
+        with self._template_cache_lock:
+            cache[template_name] = result
+            self._template_refs[template_name] = result
+            if len(cache) > TEMPLATE_CACHE_SIZE:
+                cache.popitem(last=False)
         return result
 
+    def prewarm(self, names=None):
+        """
+        Compile and cache templates ahead of the first request.
+
+        With no names given, every ``.html`` file below the directories of
+        the configured loaders is loaded. Discovered files that fail to
+        compile (e.g. ``.html`` files in third-party template dirs that aren't
+        Django templates, or that need a library this engine doesn't load)
+        are skipped and logged to the ``django.template`` logger; explicitly
+        named templates raise TemplateSyntaxError as usual. Return the list
+        of names that were cached. Only the most recent TEMPLATE_CACHE_SIZE
+        names stay in the backend cache; the engine keeps its own cache of
+        compiled templates.
+        """
+        discovered = names is None
+        if discovered:
+            names = self._discover_template_names()
+        warmed = []
+        for name in names:
+            try:
+                self.get_template(name)
+            except TemplateDoesNotExist:
+                continue
+            except TemplateSyntaxError as exc:
+                if not discovered:
+                    raise
+                logger.warning("Skipping template %r during prewarm: %s", name, exc)
+                continue
+            warmed.append(name)
+        return warmed
 
+    def _discover_template_names(self):
+        names = {}
+        for loader in self.engine.template_loaders:
+            if not hasattr(loader, "get_dirs"):
+                continue
+            for template_dir in loader.get_dirs():
+                template_dir = os.fspath(template_dir)
+                for root, _dirs, files in os.walk(template_dir):
+                    for filename in sorted(files):
+                        if filename.endswith(".html"):
+                            rel = os.path.relpath(os.path.join(root, filename), template_dir)
+                            names.setdefault(rel.replace(os.sep, "/"), None)
+        return list(names)
+
+
+@cython.cclass
 class _Template:
     """Backend template wrapper using our cythonized make_context."""
 
-    __slots__ = ("backend", "template")
+    template = cython.declare(object, visibility="public")
+    backend = cython.declare(object, visibility="public")
+    _autoescape = cython.declare(cython.bint, visibility="public")
+    __weakref__ = cython.declare(object)
 
     def __init__(self, template, backend):
         self.template = template
         self.backend = backend
+        # Snapshot once; saves the backend.autoescape lookup per render.
+        self._autoescape = backend.autoescape
 
     @property
     def origin(self):
         return self.template.origin
 
+    def __call__(self, context=None, request=None):
+        # Same as render(), but reached through tp_call without building a
+        # bound method first; the cpdef render() is then a direct C call.
+        return self.render(context, request)
+
+    @cython.ccall
     def render(self, context=None, request=None):
-        context = make_context(context, request, autoescape=self.backend.engine.autoescape)
+        if context and isinstance(context, dict) and FRAGMENT_CACHE_KEY in context:
+            return self._render_cached(context, request)
+        return self._render(context, request)
+
+    @cython.cfunc
+    def _render_cached(self, context, request):
+        context = dict(context)
+        spec = context.pop(FRAGMENT_CACHE_KEY)
+        # Output rendered with a request can depend on it (csrf_token, the
+        # user, messages), so it is never cached; the key is just dropped.
+        if request is not None:
+            return self._render(context, request)
+        if type(spec) is tuple:
+            key, timeout = spec
+        else:
+            key, timeout = spec, DEFAULT_TIMEOUT
+        key = self._fragment_key(key)
+        result = default_cache.get(key)
+        if result is None:
+            result = self._render(context, request)
+            default_cache.set(key, result, timeout)
+        return result
+
+    @cython.cfunc
+    def _fragment_key(self, key) -> str:
+        # Scope the caller's key to this template so two templates (or other
+        # users of the cache) sharing a key never see each other's entries.
+        # String templates have no origin name; their source identifies them.
+        name = self.template.origin.name
+        if name == UNKNOWN_SOURCE:
+            name = "source:" + self.template.source
+        digest = hashlib.md5(str(name).encode(), usedforsecurity=False).hexdigest()
+        return f"{FRAGMENT_CACHE_PREFIX}:{digest}:{key}"
+
+    @cython.cfunc
+    def _render(self, context, request):
+        # Request-less renders never need make_context: any dict (subclasses
+        # included) goes straight onto a pooled Context. Anything else falls
+        # through so make_context raises its usual TypeError.
+        if request is None and (context is None or isinstance(context, dict)):
+            return self._render_pooled(context)
+        context = make_context(context, request, autoescape=self._autoescape)
         try:
             return self.template.render(context)
         except TemplateDoesNotExist as exc:
             reraise(exc, self.backend)
 
+    @cython.cfunc
+    def _render_pooled(self, context):
+        # Reuse a per-thread Context instead of allocating one per render.
+        # Contexts are popped from a free list while in use, so a nested render
+        # on the same thread (e.g. a value whose __str__ renders another
+        # template) gets its own Context rather than sharing scopes.
+        pool: list = _ctx_pool()
+        ctx: Context = pool.pop() if pool else Context()
+        ctx.autoescape = self._autoescape
+        # Reset cached language so locale changes between renders are respected.
+        ctx._lang = None
+        ctx.push_scope(context if context is not None else {})
+        try:
+            return self.template.render(ctx)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self.backend)
+        finally:
+            _release_context(pool, ctx)
+
+
+@cython.cfunc
+def _ctx_pool() -> list:
+    pool: list = getattr(_render_ctx_local, "pool", None)
+    if pool is None:
+        pool = []
+        _render_ctx_local.pool = pool
+    return pool
+
+
+@cython.cfunc
+def _release_context(pool: list, ctx: Context):
+    ctx.pop_scope()
+    # A render that raised part-way can leave extra scopes behind; drop such
+    # Contexts instead of handing stale variables to the next render.
+    if len(ctx.dicts) == 1:
+        pool.append(ctx)
+
+
+@cython.cfunc
+def _strip_output(s):
+    """str.strip() that returns s itself when there is nothing to trim.
+
+    str.strip() only skips the copy for exact str instances, so rendered
+    SafeStrings would otherwise be copied on every widget render.
+    """
+    n: cython.Py_ssize_t = len(s)
+    if n == 0:
+        return s
+    first: cython.Py_UCS4 = s[0]
+    last: cython.Py_UCS4 = s[n - 1]
+    if not first.isspace() and not last.isspace():
+        return s
+    return s.strip()
+
 
 class CythonizedFormRenderer(EngineMixin, BaseRenderer):
     """Form renderer that uses our cythonized template engine for widgets.
 
-    Bypasses per-widget make_context + Context creation overhead by reusing
-    one Context per thread and pushing/popping the widget dict. Template
-    caching is handled by Engine.get_template() and
+    Bypasses per-widget make_context + Context creation overhead by taking
+    Contexts from the same per-thread free list as _Template.render, so nested
+    widget renders never share scopes. Compiled
+    templates are kept in a per-renderer lookup table keyed by template name,
+    on top of the caching in Engine.get_template() and
     CythonizedTemplates.get_template().
     """
 
     backend = CythonizedTemplates
+    # Replaced by the engine's setting once the engine is first used.
+    _autoescape = True
 
-    def render(self, template_name, context, request=None):
+    def __init__(self):
+        self._tpl_cache = {}
+
+    def _cache_tpl(self, template_name):
         tpl = self.get_template(template_name).template
+        self._autoescape = self.engine.autoescape
+        self._tpl_cache[template_name] = tpl
+        return tpl
 
-        ctx = getattr(_form_ctx_local, "ctx", None)
-        if ctx is None:
-            ctx = Context(autoescape=True)
-            _form_ctx_local.ctx = ctx
+    def render(self, template_name, context, request=None):
+        tpl = self._tpl_cache.get(template_name)
+        if tpl is None:
+            tpl = self._cache_tpl(template_name)
 
+        pool: list = _ctx_pool()
+        ctx: Context = pool.pop() if pool else Context()
+        ctx.autoescape = self._autoescape
         # Reset cached language so locale changes between requests are respected.
         ctx._lang = None
-        ctx.dicts.append(context)
+        ctx.push_scope(context)
         try:
-            return tpl.render(ctx).strip()
+            return _strip_output(tpl.render(ctx))
         finally:
-            ctx.dicts.pop()
+            _release_context(pool, ctx)
@@ -21,6 +21,8 @@ cdef class Node:
 
 cdef class TextNode(Node):
     cdef public str s
+    cdef object _safe
+    cdef object _safe_src
     cpdef render(self, Context context)
     cpdef render_annotated(self, Context context)
 
@@ -51,7 +51,6 @@ times with multiple contexts)
 """
 
 import cython
-import html as _stdlib_html
 import inspect
 import logging
 import re
@@ -65,7 +64,7 @@ from .context import BaseContext
 # in pure Python mode, they fall back to regular imports automatically.
 from cython.cimports.django_templates_cythonized.context import Context
 from cython.cimports.django_templates_cythonized.formats import localize, _float_is_str_fast
-from cython.cimports.django_templates_cythonized.html import conditional_escape
+from cython.cimports.django_templates_cythonized.html import _escape_str, _needs_escape, conditional_escape
 from cython.cimports.django_templates_cythonized.timezone import template_localtime
 from .safestring import SafeData, SafeString, mark_safe
 from django.utils.deprecation import django_file_prefixes
@@ -637,6 +636,8 @@ class Parser:
         # should use a key to namespace any added data. The 'django' namespace
         # is reserved for internal use.
         self.extra_data = {}
+        # Parsed {% if %} conditions by their bits; see defaulttags.do_if.
+        self._if_conditions = {}
 
         if libraries is None:
             libraries = {}
@@ -791,6 +792,8 @@ class Parser:
     def add_library(self, lib):
         self.tags.update(lib.tags)
         self.filters.update(lib.filters)
+        # Cached conditions may refer to filters the library just replaced.
+        self._if_conditions.clear()
 
     def compile_filter(self, token):
         """
@@ -1322,7 +1325,7 @@ class NodeList:
         if not debug and not self.contains_nontext:
             # ULTRA-FAST PATH: all TextNodes — just join .s strings, no isinstance needed
             if n == 1:
-                return SafeString(nodes[0].s)
+                return _text_safe(nodes[0])
             parts: list = [None] * n
             for i in range(n):
                 tnode: TextNode = nodes[i]
@@ -1334,8 +1337,7 @@ class NodeList:
             if n == 1:
                 node = nodes[0]
                 if isinstance(node, TextNode):
-                    tnode: TextNode = node
-                    return SafeString(tnode.s)
+                    return _text_safe(node)
                 elif isinstance(node, VariableNode):
                     vnode: VariableNode = node
                     result = _render_var_fast(vnode.filter_expression, context)
@@ -1409,6 +1411,16 @@ class TextNode(Node):
         return self.s
 
 
+@cython.cfunc
+def _text_safe(tnode: TextNode):
+    """tnode.s as a SafeString, built on first use and reused while s is unchanged."""
+    s = tnode.s
+    if tnode._safe_src is not s:
+        tnode._safe = SafeString(s)
+        tnode._safe_src = s
+    return tnode._safe
+
+
 @cython.cfunc
 def _get_lang(context: Context):
     """Resolve and cache the current language on the context."""
@@ -1539,11 +1551,10 @@ def _fast_escape(value):
     that callers storing the result back into context (e.g. firstof asvar,
     cycle as name) won't get double-escaped on re-render.
     """
-    c: cython.Py_UCS4
-    for c in value:
-        if c == 60 or c == 62 or c == 38 or c == 34 or c == 39:
-            # <, >, &, ", ' — needs escaping, delegate to html.escape
-            return SafeString(_stdlib_html.escape(value))
+    # Callers guarantee a str (possibly a subclass), so the cast is safe.
+    if _needs_escape(cython.cast(str, value)):
+        # <, >, &, ", ' — needs escaping
+        return SafeString(_escape_str(cython.cast(str, value)))
     return SafeString(value)
 
 
@@ -1553,10 +1564,8 @@ def _fast_escape_raw(value):
     Use only in hot paths where the result goes directly into a join-list
     that is subsequently wrapped in SafeString (e.g. ForNode.render nodelist).
     """
-    c: cython.Py_UCS4
-    for c in value:
-        if c == 60 or c == 62 or c == 38 or c == 34 or c == 39:
-            return _stdlib_html.escape(value)
+    if _needs_escape(cython.cast(str, value)):
+        return _escape_str(cython.cast(str, value))
     return value
 
 
@@ -1717,7 +1726,8 @@ def _fe_is_direct_loopvar(fe: FilterExpression, loopvar):
     var: Variable = fe.var
     if var.lookups is None or len(var.lookups) != 1:
         return False
-    if var.lookups[0] != loopvar:
+    head = var.lookups[0]
+    if head is not loopvar and head != loopvar:
         return False
     if var.translate:
         return False
@@ -1826,8 +1836,10 @@ class VariableNode(Node):
         return render_value_in_context(output, context)
 
 
-# Regex for token keyword arguments
-kwarg_re = _lazy_re_compile(r"(?:(\w+)=)?(.+)")
+# Regex for token keyword arguments. Compiled eagerly: url and token_kwargs
+# match it once per bit, and every access through the SimpleLazyObject
+# returned by _lazy_re_compile() goes through a Python-level __getattr__.
+kwarg_re = re.compile(r"(?:(\w+)=)?(.+)")
 
 
 def token_kwargs(bits, parser, support_legacy=False):
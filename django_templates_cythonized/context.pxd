@@ -14,3 +14,5 @@ cdef class Context(BaseContext):
     cdef public RenderContext render_context
     cdef public object template
     cdef public object _lang
+    cpdef push_scope(self, d)
+    cpdef pop_scope(self)
@@ -228,6 +228,15 @@ class Context(BaseContext):
             duplicate.__dict__.update(src_dict)
         return duplicate
 
+    @cython.ccall
+    def push_scope(self, d):
+        """Push d as-is — no merge, no ContextDict. Pair with pop_scope()."""
+        self.dicts.append(d)
+
+    @cython.ccall
+    def pop_scope(self):
+        self.dicts.pop()
+
     def update(self, other_dict):
         "Push other_dict to the stack of dictionaries in the Context"
         if not hasattr(other_dict, "__getitem__"):
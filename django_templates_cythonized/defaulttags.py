@@ -1,26 +1,35 @@
 """Default tags used by the template system, available to all templates."""
 
+import array
 import cython
+import operator
 import re
 import sys
 import warnings
 from collections import namedtuple
 from collections.abc import Iterable, Mapping
 from datetime import datetime
+from functools import lru_cache
 from itertools import cycle as itertools_cycle
 from itertools import groupby
 
 from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
 from django.http import QueryDict
 from django.utils import timezone
 from django.utils.datastructures import DeferredSubDict
-from django.utils.html import format_html
+from django.utils.html import format_html, strip_spaces_between_tags
 from django.utils.lorem_ipsum import paragraphs, words
 from django.utils.translation import get_language
 
 from .html import conditional_escape, escape
 from .safestring import SafeData, SafeString, mark_safe
 
+from cython.cimports.cpython import array
+from cython.cimports.cpython.list import PyList_New, PyList_SET_ITEM
+from cython.cimports.cpython.ref import Py_INCREF
+from cython.cimports.libc.math import fabs, isfinite, rint
 from cython.cimports.django_templates_cythonized.base import (
     Node,
     TextNode,
@@ -37,7 +46,19 @@ from cython.cimports.django_templates_cythonized.base import (
 )
 from cython.cimports.django_templates_cythonized.context import Context
 from cython.cimports.django_templates_cythonized.formats import localize, _float_is_str_fast
-from cython.cimports.django_templates_cythonized.smartif import Literal, Operator, TokenBase
+from cython.cimports.django_templates_cythonized.smartif import (
+    Literal,
+    Operator,
+    TokenBase,
+    _OP_IS,
+    _OP_IS_NOT,
+    _OP_EQ,
+    _OP_NE,
+    _OP_GT,
+    _OP_GE,
+    _OP_LT,
+    _OP_LE,
+)
 
 from .base import (
     BLOCK_TAG_END,
@@ -99,6 +120,10 @@ class CommentNode(Node):
         return ""
 
 
+_CSRF_PREFIX: str = '<input type="hidden" name="csrfmiddlewaretoken" value="'
+_CSRF_SUFFIX: str = '">'
+
+
 @cython.cclass
 class CsrfTokenNode(Node):
     child_nodelists = ()
@@ -110,6 +135,11 @@ class CsrfTokenNode(Node):
             if csrf_token == "NOTPROVIDED":
                 return format_html("")
             else:
+                # Real tokens are ASCII alphanumerics, which escaping leaves
+                # untouched; anything else goes through format_html().
+                token = str(csrf_token)
+                if token.isascii() and token.isalnum():
+                    return SafeString(_CSRF_PREFIX + token + _CSRF_SUFFIX)
                 return format_html(
                     '<input type="hidden" name="csrfmiddlewaretoken" value="{}">',
                     csrf_token,
@@ -126,12 +156,17 @@ class CsrfTokenNode(Node):
             return ""
 
 
+# Characters that make a literal cycle value need escaping.
+_CYCLE_ESCAPE_RE = re.compile(r"[<>&\"']")
+
+
 @cython.cclass
 class CycleNode(Node):
     cyclevars = cython.declare(list, visibility="public")
     variable_name = cython.declare(object, visibility="public")
     silent = cython.declare(cython.bint, visibility="public")
     _preresolved = cython.declare(tuple, visibility="public")
+    _escaped_preresolved = cython.declare(tuple, visibility="public")
     _n = cython.declare(cython.Py_ssize_t, visibility="public")
     _needs_escape = cython.declare(cython.bint, visibility="public")
 
@@ -152,29 +187,30 @@ class CycleNode(Node):
                     break
             if len(pre) == self._n:
                 self._preresolved = tuple(pre)
-                # Check if any value needs HTML escaping
-                self._needs_escape = False
-                c: cython.Py_UCS4
-                for s in pre:
-                    for c in s:
-                        if c == 60 or c == 62 or c == 38 or c == 34 or c == 39:
-                            self._needs_escape = True
-                            break
-                    if self._needs_escape:
-                        break
+                # Check if any value needs HTML escaping: one C-level regex
+                # scan over all literals.
+                self._needs_escape = _CYCLE_ESCAPE_RE.search("".join(pre)) is not None
+                # Escape once here so autoescaped renders only pick a tuple.
+                if self._needs_escape:
+                    self._escaped_preresolved = tuple(s if isinstance(s, SafeData) else escape(s) for s in pre)
+                else:
+                    self._escaped_preresolved = self._preresolved
 
     @cython.ccall
     def render(self, context: Context):
         # Fast path: pre-resolved literal strings
         if self._preresolved is not None:
-            idx: cython.Py_ssize_t = context.render_context.get(self, 0)
-            context.render_context[self] = (idx + 1) % self._n
-            value = self._preresolved[idx]
+            # Work on the top render-context dict directly: one hash probe
+            # for the read, one for the write, no RenderContext dispatch.
+            rc: dict = cython.cast(dict, context.render_context.dicts[-1])
+            idx: cython.Py_ssize_t = rc.get(self, 0)
+            nxt: cython.Py_ssize_t = idx + 1
+            rc[self] = nxt if nxt < self._n else 0
             if self.variable_name:
-                context.set_upward(self.variable_name, value)
-            if context.autoescape and self._needs_escape and not isinstance(value, SafeData):
-                return escape(value)
-            return value
+                context.set_upward(self.variable_name, self._preresolved[idx])
+            if context.autoescape:
+                return self._escaped_preresolved[idx]
+            return self._preresolved[idx]
         # General path
         if self not in context.render_context:
             # First time the node is rendered in template
@@ -205,12 +241,17 @@ class DebugNode(Node):
         if not settings.DEBUG:
             return ""
 
+        from io import StringIO
         from pprint import pformat
 
-        output = [escape(pformat(val)) for val in context]
-        output.append("\n\n")
-        output.append(escape(pformat(sys.modules)))
-        return "".join(output)
+        # Stream into a buffer so each (possibly huge) pformat() string can be
+        # freed once written instead of all of them living until the join.
+        buf = StringIO()
+        for val in context:
+            buf.write(escape(pformat(val)))
+        buf.write("\n\n")
+        buf.write(escape(pformat(sys.modules)))
+        return buf.getvalue()
 
 
 @cython.cclass
@@ -234,25 +275,233 @@ class FilterNode(Node):
 class FirstOfNode(Node):
     vars = cython.declare(list, visibility="public")
     asvar = cython.declare(object, visibility="public")
+    _literal_first = cython.declare(object, visibility="public")
+    _vars_tail = cython.declare(list, visibility="public")
 
     def __init__(self, variables, asvar=None):
         self.vars = variables
         self.asvar = asvar
+        # Leading unfiltered literals are decided at parse time: falsy ones
+        # are dropped from the render loop, and a truthy one ends it.
+        self._literal_first = None
+        start: cython.Py_ssize_t = 0
+        for fe_obj in variables:
+            fe: FilterExpression = fe_obj
+            if fe.is_var or len(fe.filters) != 0:
+                break
+            if fe.var:
+                self._literal_first = fe.var
+                break
+            start += 1
+        self._vars_tail = variables[start:]
 
     @cython.ccall
     def render(self, context: Context):
         first = ""
-        for var in self.vars:
-            value = var.resolve(context, ignore_failures=True)
-            if value:
-                first = render_value_in_context(value, context)
-                break
+        if self._literal_first is not None:
+            first = render_value_in_context(self._literal_first, context)
+        else:
+            for var in self._vars_tail:
+                value = var.resolve(context, ignore_failures=True)
+                if value:
+                    first = render_value_in_context(value, context)
+                    break
         if self.asvar:
             context[self.asvar] = first
             return ""
         return first
 
 
+@cython.cfunc
+def _set_slot(lst: list, i: cython.Py_ssize_t, value) -> cython.void:
+    # Store into a freshly PyList_New()'d slot: no old item to release.
+    Py_INCREF(value)
+    PyList_SET_ITEM(lst, i, value)
+
+
+@cython.cfunc
+def _static_text(nodes: list):
+    """Output of a nodelist made only of TextNodes and comments, which is the
+    same in every context; None if any other node is present.
+    """
+    parts: list = []
+    for nd in nodes:
+        if isinstance(nd, TextNode):
+            parts.append(cython.cast(TextNode, nd).s)
+        elif type(nd) is not CommentNode:
+            return None
+    return "".join(parts)
+
+
+@cython.cfunc
+def _node_kinds(nodes: list) -> bytes:
+    """One byte per node: 0=TextNode, 1=VariableNode, 2=anything else."""
+    kinds: bytearray = bytearray(len(nodes))
+    j: cython.Py_ssize_t
+    for j in range(len(nodes)):
+        nd = nodes[j]
+        if isinstance(nd, TextNode):
+            kinds[j] = 0
+        elif isinstance(nd, VariableNode):
+            kinds[j] = 1
+        else:
+            kinds[j] = 2
+    return bytes(kinds)
+
+
+@cython.cfunc
+def _type_is_subscriptable(tp) -> cython.bint:
+    # Classes themselves may be subscriptable through __class_getitem__.
+    return hasattr(tp, "__getitem__") or issubclass(tp, type)
+
+
+@cython.cfunc
+def _loop_item_attr(item, attr, subscriptable: cython.bint):
+    """item[attr], then getattr(item, attr), as Variable._resolve_lookup
+    tries them. Return _RESOLVE_FALLBACK when neither works.
+
+    item[attr] is only attempted when the item's type defines __getitem__;
+    otherwise it can only raise TypeError, which is costly per iteration.
+    """
+    if subscriptable:
+        try:
+            return item[attr]
+        except (TypeError, KeyError, IndexError):
+            pass
+    try:
+        return getattr(item, attr)
+    except (TypeError, AttributeError):
+        return _RESOLVE_FALLBACK
+
+
+@cython.cfunc
+def _loop_row_value(item, attr, item_is_dict: cython.bint, subscriptable: cython.bint):
+    """Resolve loopvar.attr on one loop row, or return _RESOLVE_FALLBACK.
+
+    Exact dicts take a dict.get() probe, so missing keys cost no KeyError;
+    a miss still falls back to getattr() (e.g. row.items) as Django does.
+    """
+    if item_is_dict:
+        value = cython.cast(dict, item).get(attr, _RESOLVE_FALLBACK)
+        if value is not _RESOLVE_FALLBACK:
+            return value
+        return _loop_item_attr(item, attr, False)
+    return _loop_item_attr(item, attr, subscriptable)
+
+
+# LOOPIF right-hand side kinds, fixed at classification time so the loop can
+# skip the generic rich comparison for the common literal types.
+_RHS_ANY: cython.int = 0
+_RHS_INT: cython.int = 1
+_RHS_NONE: cython.int = 2
+_RHS_STR: cython.int = 3
+_RHS_FLOAT: cython.int = 4
+
+
+# Comparator per op code for the generic LOOPIF path: one tuple load and call
+# instead of an if/elif cascade over the op codes.
+_CMP_OPS: tuple = tuple(
+    {
+        OP_IS: operator.is_,
+        OP_IS_NOT: operator.is_not,
+        OP_EQ: operator.eq,
+        OP_NE: operator.ne,
+        OP_GT: operator.gt,
+        OP_GE: operator.ge,
+        OP_LT: operator.lt,
+        OP_LE: operator.le,
+    }.get(code)
+    for code in range(OP_LE + 1)
+)
+
+
+@cython.cfunc
+def _loopif_rhs_kind(op: cython.int, rhs) -> cython.int:
+    if op == _OP_EQ or op == _OP_NE:
+        if rhs is None:
+            return _RHS_NONE
+        if isinstance(rhs, str):
+            return _RHS_STR
+    if type(rhs) is int and _OP_EQ <= op <= _OP_LE:
+        try:
+            _rl: cython.long = rhs
+        except OverflowError:
+            return _RHS_ANY
+        return _RHS_INT
+    if type(rhs) is float and _OP_EQ <= op <= _OP_LE:
+        return _RHS_FLOAT
+    return _RHS_ANY
+
+
+@cython.cfunc
+def _loopif_compare(val, op: cython.int, rhs, kind: cython.int) -> cython.bint:
+    """Evaluate one LOOPIF condition. Errors count as a non-match, as in
+    Operator.eval().
+    """
+    lv: cython.long
+    rv: cython.long
+    ld: cython.double
+    rd: cython.double
+    eq: cython.bint
+    if kind == _RHS_INT and type(val) is int:
+        try:
+            lv = val
+        except OverflowError:
+            pass
+        else:
+            rv = rhs
+            if op == _OP_EQ:
+                return lv == rv
+            if op == _OP_NE:
+                return lv != rv
+            if op == _OP_GT:
+                return lv > rv
+            if op == _OP_GE:
+                return lv >= rv
+            if op == _OP_LT:
+                return lv < rv
+            return lv <= rv
+    elif kind == _RHS_FLOAT and type(val) is float:
+        ld = val
+        rd = rhs
+        if op == _OP_EQ:
+            return ld == rd
+        if op == _OP_NE:
+            return ld != rd
+        if op == _OP_GT:
+            return ld > rd
+        if op == _OP_GE:
+            return ld >= rd
+        if op == _OP_LT:
+            return ld < rd
+        return ld <= rd
+    elif kind == _RHS_NONE and val is None:
+        return op == _OP_EQ
+    elif kind == _RHS_STR and type(val) is str:
+        eq = cython.cast(str, val) == cython.cast(str, rhs)
+        return eq if op == _OP_EQ else not eq
+    try:
+        if op == -1:
+            return val
+        return _CMP_OPS[op](val, rhs)
+    except Exception:
+        return False
+
+
+# forloop key -> tag for CForloopContext.__getitem__: one hash probe (str
+# hashes are cached) replaces a chain of string comparisons.
+_FORLOOP_KEYS: dict = {
+    "counter0": 0,
+    "counter": 1,
+    "revcounter": 2,
+    "revcounter0": 3,
+    "first": 4,
+    "last": 5,
+    "length": 6,
+    "parentloop": 7,
+}
+
+
 @cython.cclass
 class CForloopContext:
     """C-level forloop struct. Stores only (i, length) as C ints and computes
@@ -271,21 +520,22 @@ class CForloopContext:
         self._extra = None
 
     def __getitem__(self, key):
-        if key == "counter0":
+        tag: cython.int = _FORLOOP_KEYS.get(key, -1)
+        if tag == 0:
             return self._i
-        if key == "counter":
+        if tag == 1:
             return self._i + 1
-        if key == "revcounter":
+        if tag == 2:
             return self._length - self._i
-        if key == "revcounter0":
+        if tag == 3:
             return self._length - self._i - 1
-        if key == "first":
+        if tag == 4:
             return self._i == 0
-        if key == "last":
+        if tag == 5:
             return self._i == self._length - 1
-        if key == "length":
+        if tag == 6:
             return self._length
-        if key == "parentloop":
+        if tag == 7:
             return self._parentloop
         if self._extra is not None:
             return self._extra[key]
@@ -297,16 +547,7 @@ class CForloopContext:
         self._extra[key] = value
 
     def __contains__(self, key):
-        if isinstance(key, str) and key in (
-            "counter0",
-            "counter",
-            "revcounter",
-            "revcounter0",
-            "first",
-            "last",
-            "length",
-            "parentloop",
-        ):
+        if isinstance(key, str) and key in _FORLOOP_KEYS:
             return True
         return self._extra is not None and key in self._extra
 
@@ -318,6 +559,38 @@ class CForloopContext:
             return default
 
 
+@cython.cfunc
+def _merge_text_slots(tags: list, attrs: list, text: list, nodes: list) -> tuple:
+    """Merge adjacent TEXT (tag 0) slots of a classified loop body."""
+    j: cython.Py_ssize_t
+    num_nodes: cython.Py_ssize_t = len(tags)
+    _prev_was_text: cython.bint = False
+    _has_adj_text: cython.bint = False
+    for j in range(num_nodes):
+        if tags[j] == 0:
+            if _prev_was_text:
+                _has_adj_text = True
+                break
+            _prev_was_text = True
+        else:
+            _prev_was_text = False
+    if not _has_adj_text:
+        return tags, attrs, text, nodes
+    _m_tags: list = []
+    _m_attrs: list = []
+    _m_text: list = []
+    _m_nodes: list = []
+    for j in range(num_nodes):
+        if tags[j] == 0 and len(_m_tags) > 0 and _m_tags[len(_m_tags) - 1] == 0:
+            _m_text[len(_m_text) - 1] = _m_text[len(_m_text) - 1] + text[j]
+        else:
+            _m_tags.append(tags[j])
+            _m_attrs.append(attrs[j])
+            _m_text.append(text[j])
+            _m_nodes.append(nodes[j])
+    return _m_tags, _m_attrs, _m_text, _m_nodes
+
+
 @cython.cclass
 class ForNode(Node):
     loopvars = cython.declare(list, visibility="public")
@@ -325,10 +598,23 @@ class ForNode(Node):
     is_reversed = cython.declare(cython.bint, visibility="public")
     nodelist_loop = cython.declare(object, visibility="public")
     nodelist_empty = cython.declare(object, visibility="public")
+    # Cached body analysis, see _analyze_body().
+    _fa_ready = cython.declare(cython.bint, visibility="public")
+    _fa_dynamic = cython.declare(cython.bint, visibility="public")
+    _fa_needs_ctx_write = cython.declare(cython.bint, visibility="public")
+    _fa_can_cache_consts = cython.declare(cython.bint, visibility="public")
+    _fa_tags = cython.declare(list, visibility="public")
+    _fa_attrs = cython.declare(list, visibility="public")
+    _fa_text = cython.declare(list, visibility="public")
+    _fa_nodes = cython.declare(list, visibility="public")
+    _fa_written = cython.declare(set, visibility="public")
+    _empty_is_text = cython.declare(cython.bint, visibility="public")
     child_nodelists = ("nodelist_loop", "nodelist_empty")
 
     def __init__(self, loopvars, sequence, is_reversed, nodelist_loop, nodelist_empty=None):
-        self.loopvars = loopvars
+        # Interned (a bounded set of names) so the loop-body classifier's
+        # `is` check often matches before falling back to ==.
+        self.loopvars = [sys.intern(v) for v in loopvars]
         self.sequence = sequence
         self.is_reversed = is_reversed
         self.nodelist_loop = nodelist_loop
@@ -336,6 +622,13 @@ class ForNode(Node):
             self.nodelist_empty = NodeList()
         else:
             self.nodelist_empty = nodelist_empty
+        # A text-only (or absent) {% empty %} branch can't write to the
+        # context, so it renders without a scope push.
+        self._empty_is_text = True
+        for nd in self.nodelist_empty:
+            if not isinstance(nd, TextNode):
+                self._empty_is_text = False
+                break
 
     def __repr__(self):
         reversed_text = " reversed" if self.is_reversed else ""
@@ -347,6 +640,347 @@ class ForNode(Node):
             reversed_text,
         )
 
+    @cython.cfunc
+    def _analyze_body(self):
+        """Classify the loop body for the optimized loop paths.
+
+        Only the parsed loop is inspected, never a context, so the result is
+        computed on the first non-debug render and reused. Slots whose final
+        form depends on the context are left as candidates and resolved per
+        render: 9=CONST_VAR, 10=LOOPIF_CONST, 11=LOOPCYCLE.
+        """
+        j: cython.Py_ssize_t
+        unpack: cython.bint = len(self.loopvars) > 1
+        loop_nodes: list = self.nodelist_loop._nodes
+        num_nodes: cython.Py_ssize_t = len(loop_nodes)
+        loopvar0 = self.loopvars[0] if not unpack else None
+
+        # Pre-scan loop body: check if we can bypass context writes entirely.
+        # Possible when all non-TextNode nodes are simple VariableNodes that
+        # directly reference the loop variable (single-segment, no translate,
+        # eligible filters). Saves the dict write + dict scan round-trip.
+        needs_ctx_write = True
+        if not unpack:
+            needs_ctx_write = False
+            for j in range(num_nodes):
+                nd = loop_nodes[j]
+                if isinstance(nd, TextNode):
+                    continue
+                if isinstance(nd, VariableNode):
+                    nd_vnode: VariableNode = nd
+                    if _fe_is_direct_loopvar(nd_vnode.filter_expression, loopvar0):
+                        continue
+                needs_ctx_write = True
+                break
+
+        # Pre-classify loop body nodes for LOOPATTR optimization.
+        # For {{ loopvar.attr }} patterns, resolve item[attr] directly
+        # instead of writing to context and scanning back through dicts.
+        # Tag codes: 0=TEXT, 1=VAR, 2=LOOPATTR_NOFILTER, 3=LOOPATTR_FILTER,
+        #            4=OTHER, 5=LOOPIF, 12=LOOPIF_BOOL_TT
+        _ntags: list = None
+        _nattrs: list = None
+        _ntext: list = None
+        if needs_ctx_write and not unpack:
+            _ntags = [4] * num_nodes
+            _nattrs = [None] * num_nodes
+            _ntext = [None] * num_nodes
+            # Collect variable names written by loop body nodes (e.g. cycle's "as rowclass").
+            # These must NOT be cached as constants.
+            _loop_written_vars: set = set()
+            _can_cache_consts: cython.bint = True
+            for j in range(num_nodes):
+                _nd_w = loop_nodes[j]
+                if not isinstance(_nd_w, (TextNode, VariableNode, IfNode, CycleNode)):
+                    # Non-standard nodes (custom tags etc.) may modify
+                    # context variables — disable constant var caching.
+                    _can_cache_consts = False
+            # Deep scan: find variable names written by ANY tag in the
+            # loop body, including inside IfNode branches. Tags like
+            # firstof/now/url/widthratio use 'asvar', cycle uses
+            # 'variable_name', regroup uses 'var_name'. All write
+            # directly to context without push/pop scoping.
+            if _can_cache_consts:
+                for _nd_deep in self.nodelist_loop.get_nodes_by_type(Node):
+                    _ndd_asvar = getattr(_nd_deep, "asvar", None)
+                    if _ndd_asvar:
+                        _loop_written_vars.add(_ndd_asvar)
+                    _ndd_vn = getattr(_nd_deep, "variable_name", None)
+                    if _ndd_vn:
+                        _loop_written_vars.add(_ndd_vn)
+                    _ndd_var = getattr(_nd_deep, "var_name", None)
+                    if _ndd_var:
+                        _loop_written_vars.add(_ndd_var)
+            # The body may mutate the sequence it loops over
+            # ({{ items.pop }}), so nothing rooted at it is constant.
+            if isinstance(self.sequence, FilterExpression):
+                _seq_fe: FilterExpression = self.sequence
+                if _seq_fe.is_var and _seq_fe.var.lookups is not None:
+                    _loop_written_vars.add(_seq_fe.var.lookups[0])
+            for j in range(num_nodes):
+                _nd = loop_nodes[j]
+                if isinstance(_nd, TextNode):
+                    _tnd: TextNode = _nd
+                    _ntags[j] = 0
+                    _ntext[j] = _tnd.s
+                elif isinstance(_nd, VariableNode):
+                    _ntags[j] = 1  # default: regular VAR
+                    _vnd: VariableNode = _nd
+                    _fec: FilterExpression = _vnd.filter_expression
+                    if _fec.is_var:
+                        _varc = _fec.var
+                        if not _varc.translate:
+                            _lkc = _varc.lookups
+                            if _lkc is not None and len(_lkc) >= 1:
+                                if _lkc[0] is loopvar0 or _lkc[0] == loopvar0:
+                                    if len(_lkc) == 2:
+                                        _lkt: tuple = _lkc
+                                        _nf: cython.Py_ssize_t = len(_fec.filters)
+                                        if _nf == 0:
+                                            _ntags[j] = 2  # LOOPATTR_NOFILTER
+                                            _nattrs[j] = _lkt[1]
+                                        elif _nf == 1:
+                                            _ntags[j] = 3  # LOOPATTR_FILTER
+                                            _nattrs[j] = _lkt[1]
+                                elif _lkc[0] == "forloop" and len(_lkc) == 2 and len(_fec.filters) == 0:
+                                    # {{ forloop.counter }}, {{ forloop.counter0 }}, etc.
+                                    # Use loop_ctx directly instead of context dict scan.
+                                    _fl_attr = _lkc[1]
+                                    if _fl_attr == "counter":
+                                        _ntags[j] = 8
+                                        _nattrs[j] = 1  # offset from _i
+                                    elif _fl_attr == "counter0":
+                                        _ntags[j] = 8
+                                        _nattrs[j] = 0
+                                    elif _fl_attr == "revcounter":
+                                        _ntags[j] = 8
+                                        _nattrs[j] = -1  # signal for revcounter
+                                    elif _fl_attr == "revcounter0":
+                                        _ntags[j] = 8
+                                        _nattrs[j] = -2  # signal for revcounter0
+                                elif _can_cache_consts and _lkc[0] != "forloop" and _lkc[0] not in _loop_written_vars:
+                                    # Non-loop variable (e.g. {{ currency }}) —
+                                    # rendered once per render and cached as text.
+                                    # Only safe when no OTHER nodes exist that
+                                    # could modify context variables.
+                                    _ntags[j] = 9  # CONST_VAR
+                elif isinstance(_nd, IfNode):
+                    # First try LOOPIF_CONST: if conditions don't reference
+                    # the loop variable, evaluate once and pre-determine the branch.
+                    # Tag code 6 = LOOPIF_CONST.
+                    _if_nd_c: IfNode = _nd
+                    _is_const: cython.bint = True
+                    for _cn_c in _if_nd_c.conditions_nodelists:
+                        _cond_c = _cn_c[0]
+                        if _cond_c is None:
+                            continue  # else clause
+                        # Check if condition references the loop variable
+                        if isinstance(_cond_c, TemplateLiteral):
+                            _tl_c: TemplateLiteral = _cond_c
+                            _tl_fe_c: FilterExpression = _tl_c.value
+                            if _tl_fe_c.is_var:
+                                _tl_var_c = _tl_fe_c.var
+                                _tl_lk_c = _tl_var_c.lookups
+                                if _tl_lk_c is not None and len(_tl_lk_c) >= 1:
+                                    if _tl_lk_c[0] is loopvar0 or _tl_lk_c[0] == loopvar0 or _tl_lk_c[0] == "forloop":
+                                        _is_const = False
+                                        break
+                        elif isinstance(_cond_c, Operator):
+                            # For operators, check both sides
+                            _op_c: Operator = _cond_c
+                            _op_first_c: TokenBase = _op_c.first
+                            _op_second_c: TokenBase = _op_c.second
+                            for _side_c in (_op_first_c, _op_second_c):
+                                if _side_c is not None and isinstance(_side_c, TemplateLiteral):
+                                    _s_tl: TemplateLiteral = _side_c
+                                    _s_fe: FilterExpression = _s_tl.value
+                                    if _s_fe.is_var:
+                                        _s_var = _s_fe.var
+                                        _s_lk = _s_var.lookups
+                                        if _s_lk is not None and len(_s_lk) >= 1:
+                                            if _s_lk[0] is loopvar0 or _s_lk[0] == loopvar0 or _s_lk[0] == "forloop":
+                                                _is_const = False
+                                                break
+                                elif _side_c is not None and not isinstance(_side_c, TemplateLiteral):
+                                    # Nested Operator (compound and/or/not) —
+                                    # conservatively assume it may reference loop var.
+                                    _is_const = False
+                                    break
+                            if not _is_const:
+                                break
+                        else:
+                            _is_const = False
+                            break
+                    if _is_const:
+                        # Condition doesn't reference the loop var: the
+                        # branch is picked once per render.
+                        _ntags[j] = 10  # LOOPIF_CONST
+                        continue  # skip LOOPIF classification below
+                    # Try to classify IfNode for LOOPIF optimization.
+                    # Conditions must be simple loopvar.attr boolean or
+                    # loopvar.attr <op> literal comparisons.
+                    # Tuple format: (attr, op, rhs, nodelist_or_None, text_or_None, rhs_kind)
+                    # When text is not None, branch result is pre-computed (single TextNode).
+                    _if_nd: IfNode = _nd
+                    _conds_nls = _if_nd.conditions_nodelists
+                    _if_info: list = []
+                    _if_ok: cython.bint = True
+                    for _cn in _conds_nls:
+                        _cond = _cn[0]
+                        _nl = _cn[1]
+                        # Pre-extract text for static (text/comment only) branches
+                        _br_nl = _nl
+                        _br_text = _static_text(_nl._nodes)
+                        if _br_text is not None:
+                            _br_nl = None  # don't need NodeList
+                        if _cond is None:
+                            # else clause — always matches
+                            _if_info.append((None, -1, None, _br_nl, _br_text, _RHS_ANY))
+                        elif isinstance(_cond, TemplateLiteral):
+                            # Simple boolean: {% if book.attr %}
+                            _tl: TemplateLiteral = _cond
+                            _tl_fe: FilterExpression = _tl.value
+                            if _tl_fe.is_var and len(_tl_fe.filters) == 0:
+                                _tl_var = _tl_fe.var
+                                if not _tl_var.translate:
+                                    _tl_lk = _tl_var.lookups
+                                    if _tl_lk is not None and len(_tl_lk) == 2:
+                                        _tl_lkt: tuple = _tl_lk
+                                        if _tl_lkt[0] is loopvar0 or _tl_lkt[0] == loopvar0:
+                                            _if_info.append((_tl_lkt[1], -1, None, _br_nl, _br_text, _RHS_ANY))
+                                            continue
+                            _if_ok = False
+                            break
+                        elif isinstance(_cond, Operator):
+                            # Comparison: {% if book.attr == literal %}
+                            _op: Operator = _cond
+                            _op_code: cython.int = _op.op_code
+                            if _op_code < _OP_IS or _op_code > _OP_LE:
+                                _if_ok = False
+                                break
+                            _op_first: TokenBase = _op.first
+                            _op_second: TokenBase = _op.second
+                            # First must be TemplateLiteral for loopvar.attr
+                            if not isinstance(_op_first, TemplateLiteral):
+                                _if_ok = False
+                                break
+                            _lhs_tl: TemplateLiteral = _op_first
+                            _lhs_fe: FilterExpression = _lhs_tl.value
+                            if not _lhs_fe.is_var or len(_lhs_fe.filters) != 0:
+                                _if_ok = False
+                                break
+                            _lhs_var = _lhs_fe.var
+                            if _lhs_var.translate:
+                                _if_ok = False
+                                break
+                            _lhs_lk = _lhs_var.lookups
+                            if _lhs_lk is None or len(_lhs_lk) != 2:
+                                _if_ok = False
+                                break
+                            _lhs_lkt: tuple = _lhs_lk
+                            if _lhs_lkt[0] is not loopvar0 and _lhs_lkt[0] != loopvar0:
+                                _if_ok = False
+                                break
+                            # Second must be TemplateLiteral with a literal value (no Variable lookup)
+                            if not isinstance(_op_second, TemplateLiteral):
+                                _if_ok = False
+                                break
+                            _rhs_tl: TemplateLiteral = _op_second
+                            _rhs_fe: FilterExpression = _rhs_tl.value
+                            if _rhs_fe.is_var:
+                                _rhs_var = _rhs_fe.var
+                                if _rhs_var.lookups is not None:
+                                    _if_ok = False
+                                    break
+                                _rhs_val = _rhs_var.literal
+                            else:
+                                _rhs_val = _rhs_fe.var
+                            if len(_rhs_fe.filters) != 0:
+                                _if_ok = False
+                                break
+                            _rhs_kind: cython.int = _loopif_rhs_kind(_op_code, _rhs_val)
+                            if _rhs_kind == _RHS_STR:
+                                # Exact str (not SafeString) for the unicode
+                                # equality fast path.
+                                _rhs_val = "%s" % _rhs_val
+                            _if_info.append((_lhs_lkt[1], _op_code, _rhs_val, _br_nl, _br_text, _rhs_kind))
+                        else:
+                            _if_ok = False
+                            break
+                    if _if_ok and len(_if_info) > 0:
+                        # Check if all conditions reference the same attr
+                        # (common for {% if x.a == 1 %}{% elif x.a == 2 %}...)
+                        # If so, resolve attr once and reuse for all comparisons.
+                        _same_attr = None
+                        _all_same: cython.bint = True
+                        for _ie in _if_info:
+                            _ie_attr = _ie[0]
+                            if _ie_attr is None:
+                                continue  # else clause
+                            if _same_attr is None:
+                                _same_attr = _ie_attr
+                            elif _ie_attr != _same_attr:
+                                _all_same = False
+                                break
+                        _ntags[j] = 5  # LOOPIF
+                        # {% if x.attr %}A{% else %}B{% endif %} with text-only
+                        # branches: store (attr, text_true, text_false) so the
+                        # loop picks a string without walking _if_info.
+                        _n_if: cython.Py_ssize_t = len(_if_info)
+                        _ie0: tuple = _if_info[0]
+                        if _ie0[0] is not None and _ie0[1] == -1 and _ie0[4] is not None:
+                            if _n_if == 1:
+                                _ntags[j] = 12  # LOOPIF_BOOL_TT
+                                _nattrs[j] = (_ie0[0], _ie0[4], "")
+                                continue
+                            _ie1: tuple = _if_info[1]
+                            if _n_if == 2 and _ie1[0] is None and _ie1[4] is not None:
+                                _ntags[j] = 12  # LOOPIF_BOOL_TT
+                                _nattrs[j] = (_ie0[0], _ie0[4], _ie1[4])
+                                continue
+                        # Store (same_attr_or_None, conditions_list)
+                        if _all_same and _same_attr is not None:
+                            _nattrs[j] = (_same_attr, _if_info)
+                        else:
+                            _nattrs[j] = (None, _if_info)
+
+        # Pre-classify CycleNode for LOOPCYCLE optimization (tag 7).
+        # For cycle nodes with pre-resolved literals and `as varname`,
+        # inline the modulo counter and context write.
+        # Skip LOOPCYCLE for CycleNodes that:
+        # 1. Have a matching ResetCycleNode in the loop body
+        # 2. Were already rendered before the loop (named cycle refs
+        #    like {% cycle abc %} which returns the same CycleNode
+        #    that was defined and rendered outside the loop)
+        if _ntags is not None:
+            # Scan the ENTIRE loop nodelist (including nested nodes)
+            # for ResetCycleNodes, since they may be inside IfNode etc.
+            _reset_cycle_targets: set = set()
+            for _rcn in self.nodelist_loop.get_nodes_by_type(ResetCycleNode):
+                _reset_cycle_targets.add(_rcn.node)
+            for j in range(num_nodes):
+                if _ntags[j] == 4 and isinstance(loop_nodes[j], CycleNode):
+                    _cyc_nd: CycleNode = loop_nodes[j]
+                    if _cyc_nd._preresolved is not None and _cyc_nd not in _reset_cycle_targets:
+                        # Becomes LOOPCYCLE unless already rendered; see render().
+                        _ntags[j] = 11
+
+        self._fa_dynamic = False
+        if _ntags is not None:
+            for j in range(num_nodes):
+                if 9 <= _ntags[j] <= 11:
+                    self._fa_dynamic = True
+                    break
+            _ntags, _nattrs, _ntext, loop_nodes = _merge_text_slots(_ntags, _nattrs, _ntext, loop_nodes)
+            self._fa_can_cache_consts = _can_cache_consts
+            self._fa_written = _loop_written_vars
+        self._fa_needs_ctx_write = needs_ctx_write
+        self._fa_tags = _ntags
+        self._fa_attrs = _nattrs
+        self._fa_text = _ntext
+        self._fa_nodes = loop_nodes
+        self._fa_ready = True
+
     @cython.wraparound(False)
     @cython.ccall
     def render(self, context: Context):
@@ -365,26 +999,36 @@ class ForNode(Node):
             parentloop = context["forloop"]
         else:
             parentloop = {}
+        values = self.sequence.resolve(context, ignore_failures=True)
+        if values is None:
+            values = []
+        if not hasattr(values, "__len__"):
+            values = list(values)
+        len_values = len(values)
+        if len_values < 1:
+            if self._empty_is_text:
+                return self.nodelist_empty.render(context)
+            context.dicts.append({})
+            try:
+                return self.nodelist_empty.render(context)
+            finally:
+                context.dicts.pop()
         # Inline context.push() — plain dict append avoids ContextDict overhead.
         context.dicts.append({})
         try:
-            values = self.sequence.resolve(context, ignore_failures=True)
-            if values is None:
-                values = []
-            if not hasattr(values, "__len__"):
-                values = list(values)
-            len_values = len(values)
-            if len_values < 1:
-                return self.nodelist_empty.render(context)
-            if self.is_reversed:
-                values = reversed(values)
+            # Reversed loops walk the sequence backwards by index instead of
+            # going through a reversed() iterator.
+            rev: cython.bint = self.is_reversed
+            if type(values) is not list and type(values) is not tuple:
+                # Sized but not necessarily indexable (dicts, sets, querysets):
+                # snapshot in iteration order so the loops below can index.
+                values = list(reversed(values)) if rev else list(values)
+                rev = False
             num_loopvars = len(self.loopvars)
             unpack = num_loopvars > 1
             # Pre-extract loop nodes for C-level iteration
             loop_nodes: list = self.nodelist_loop._nodes
             num_nodes = len(loop_nodes)
-            # Pre-allocate output list
-            nodelist: list = [None] * (len_values * num_nodes)
             idx = 0
             # Check debug once
             tmpl = context.template
@@ -393,340 +1037,82 @@ class ForNode(Node):
             _dicts = context.dicts
             top: dict = _dicts[len(_dicts) - 1]
             loopvar0 = self.loopvars[0] if not unpack else None
+            if num_loopvars == 2:
+                pair_k, pair_v = self.loopvars
 
-            # Pre-scan loop body: check if we can bypass context writes entirely.
-            # Possible when all non-TextNode nodes are simple VariableNodes that
-            # directly reference the loop variable (single-segment, no translate,
-            # eligible filters). Saves the dict write + dict scan round-trip.
+            # Loop-body classification depends only on the parsed loop and is
+            # cached by _analyze_body(); debug renders use the generic path.
             needs_ctx_write = True
-            if not unpack and not debug:
-                needs_ctx_write = False
-                for j in range(num_nodes):
-                    nd = loop_nodes[j]
-                    if isinstance(nd, TextNode):
-                        continue
-                    if isinstance(nd, VariableNode):
-                        nd_vnode: VariableNode = nd
-                        if _fe_is_direct_loopvar(nd_vnode.filter_expression, loopvar0):
-                            continue
-                    needs_ctx_write = True
-                    break
-
-            # Pre-classify loop body nodes for LOOPATTR optimization.
-            # For {{ loopvar.attr }} patterns, resolve item[attr] directly
-            # instead of writing to context and scanning back through dicts.
-            # Tag codes: 0=TEXT, 1=VAR, 2=LOOPATTR_NOFILTER, 3=LOOPATTR_FILTER,
-            #            4=OTHER, 5=LOOPIF
             _ntags: list = None
             _nattrs: list = None
             _ntext: list = None
-            if needs_ctx_write and not unpack and not debug:
-                _ntags = [4] * num_nodes
-                _nattrs = [None] * num_nodes
-                _ntext = [None] * num_nodes
-                # Collect variable names written by loop body nodes (e.g. cycle's "as rowclass").
-                # These must NOT be cached as constants.
-                _loop_written_vars: set = set()
-                _can_cache_consts: cython.bint = True
-                for j in range(num_nodes):
-                    _nd_w = loop_nodes[j]
-                    if not isinstance(_nd_w, (TextNode, VariableNode, IfNode, CycleNode)):
-                        # Non-standard nodes (custom tags etc.) may modify
-                        # context variables — disable constant var caching.
-                        _can_cache_consts = False
-                # Deep scan: find variable names written by ANY tag in the
-                # loop body, including inside IfNode branches. Tags like
-                # firstof/now/url/widthratio use 'asvar', cycle uses
-                # 'variable_name', regroup uses 'var_name'. All write
-                # directly to context without push/pop scoping.
-                if _can_cache_consts:
-                    for _nd_deep in self.nodelist_loop.get_nodes_by_type(Node):
-                        _ndd_asvar = getattr(_nd_deep, "asvar", None)
-                        if _ndd_asvar:
-                            _loop_written_vars.add(_ndd_asvar)
-                        _ndd_vn = getattr(_nd_deep, "variable_name", None)
-                        if _ndd_vn:
-                            _loop_written_vars.add(_ndd_vn)
-                        _ndd_var = getattr(_nd_deep, "var_name", None)
-                        if _ndd_var:
-                            _loop_written_vars.add(_ndd_var)
+            if not debug:
+                if not self._fa_ready:
+                    self._analyze_body()
+                needs_ctx_write = self._fa_needs_ctx_write
+                _ntags = self._fa_tags
+            if _ntags is not None:
+                _nattrs = self._fa_attrs
+                _ntext = self._fa_text
+                loop_nodes = self._fa_nodes
+                num_nodes = len(_ntags)
+            if _ntags is not None and self._fa_dynamic:
+                # Resolve the context-dependent candidate slots on copies.
+                _ntags = list(_ntags)
+                _nattrs = list(_nattrs)
+                _ntext = list(_ntext)
+                _can_cache_consts: cython.bint = self._fa_can_cache_consts
+                _loop_written_vars: set = self._fa_written
                 for j in range(num_nodes):
-                    _nd = loop_nodes[j]
-                    if isinstance(_nd, TextNode):
-                        _tnd: TextNode = _nd
+                    _rtag: cython.int = _ntags[j]
+                    if _rtag == 9:  # CONST_VAR: render once as text
+                        _vnd: VariableNode = loop_nodes[j]
                         _ntags[j] = 0
-                        _ntext[j] = _tnd.s
-                    elif isinstance(_nd, VariableNode):
-                        _ntags[j] = 1  # default: regular VAR
-                        _vnd: VariableNode = _nd
-                        _fec: FilterExpression = _vnd.filter_expression
-                        if _fec.is_var:
-                            _varc = _fec.var
-                            if not _varc.translate:
-                                _lkc = _varc.lookups
-                                if _lkc is not None and len(_lkc) >= 1:
-                                    if _lkc[0] == loopvar0:
-                                        if len(_lkc) == 2:
-                                            _lkt: tuple = _lkc
-                                            _nf: cython.Py_ssize_t = len(_fec.filters)
-                                            if _nf == 0:
-                                                _ntags[j] = 2  # LOOPATTR_NOFILTER
-                                                _nattrs[j] = _lkt[1]
-                                            elif _nf == 1:
-                                                _ntags[j] = 3  # LOOPATTR_FILTER
-                                                _nattrs[j] = _lkt[1]
-                                    elif _lkc[0] == "forloop" and len(_lkc) == 2 and len(_fec.filters) == 0:
-                                        # {{ forloop.counter }}, {{ forloop.counter0 }}, etc.
-                                        # Use loop_ctx directly instead of context dict scan.
-                                        _fl_attr = _lkc[1]
-                                        if _fl_attr == "counter":
-                                            _ntags[j] = 8
-                                            _nattrs[j] = 1  # offset from _i
-                                        elif _fl_attr == "counter0":
-                                            _ntags[j] = 8
-                                            _nattrs[j] = 0
-                                        elif _fl_attr == "revcounter":
-                                            _ntags[j] = 8
-                                            _nattrs[j] = -1  # signal for revcounter
-                                        elif _fl_attr == "revcounter0":
-                                            _ntags[j] = 8
-                                            _nattrs[j] = -2  # signal for revcounter0
-                                    elif (
-                                        _can_cache_consts and _lkc[0] != "forloop" and _lkc[0] not in _loop_written_vars
-                                    ):
-                                        # Non-loop variable (e.g. {{ currency }}) —
-                                        # render once and cache as text.
-                                        # Only safe when no OTHER nodes exist that
-                                        # could modify context variables.
-                                        _ntags[j] = 0
-                                        _ntext[j] = _vnd.render(context)
-                    elif isinstance(_nd, IfNode):
-                        # First try LOOPIF_CONST: if conditions don't reference
-                        # the loop variable, evaluate once and pre-determine the branch.
-                        # Tag code 6 = LOOPIF_CONST.
-                        _if_nd_c: IfNode = _nd
-                        _is_const: cython.bint = True
-                        for _cn_c in _if_nd_c.conditions_nodelists:
-                            _cond_c = _cn_c[0]
-                            if _cond_c is None:
-                                continue  # else clause
-                            # Check if condition references the loop variable
-                            if isinstance(_cond_c, TemplateLiteral):
-                                _tl_c: TemplateLiteral = _cond_c
-                                _tl_fe_c: FilterExpression = _tl_c.value
-                                if _tl_fe_c.is_var:
-                                    _tl_var_c = _tl_fe_c.var
-                                    _tl_lk_c = _tl_var_c.lookups
-                                    if _tl_lk_c is not None and len(_tl_lk_c) >= 1:
-                                        if _tl_lk_c[0] == loopvar0 or _tl_lk_c[0] == "forloop":
-                                            _is_const = False
-                                            break
-                            elif isinstance(_cond_c, Operator):
-                                # For operators, check both sides
-                                _op_c: Operator = _cond_c
-                                _op_first_c: TokenBase = _op_c.first
-                                _op_second_c: TokenBase = _op_c.second
-                                for _side_c in (_op_first_c, _op_second_c):
-                                    if _side_c is not None and isinstance(_side_c, TemplateLiteral):
-                                        _s_tl: TemplateLiteral = _side_c
-                                        _s_fe: FilterExpression = _s_tl.value
-                                        if _s_fe.is_var:
-                                            _s_var = _s_fe.var
-                                            _s_lk = _s_var.lookups
-                                            if _s_lk is not None and len(_s_lk) >= 1:
-                                                if _s_lk[0] == loopvar0 or _s_lk[0] == "forloop":
-                                                    _is_const = False
-                                                    break
-                                    elif _side_c is not None and not isinstance(_side_c, TemplateLiteral):
-                                        # Nested Operator (compound and/or/not) —
-                                        # conservatively assume it may reference loop var.
-                                        _is_const = False
-                                        break
-                                if not _is_const:
-                                    break
-                            else:
-                                _is_const = False
+                        _ntext[j] = _vnd.render(context)
+                    elif _rtag == 10:  # LOOPIF_CONST: evaluate once, pick branch
+                        _if_nd_c: IfNode = loop_nodes[j]
+                        _const_nl = None
+                        for _cn_c2 in _if_nd_c.conditions_nodelists:
+                            _cond_c2 = _cn_c2[0]
+                            _nl_c2 = _cn_c2[1]
+                            if _cond_c2 is None:
+                                _const_nl = _nl_c2
                                 break
-                        if _is_const:
-                            # Condition doesn't reference loop var — evaluate once.
-                            # Find the matching branch.
-                            _const_nl = None
-                            for _cn_c2 in _if_nd_c.conditions_nodelists:
-                                _cond_c2 = _cn_c2[0]
-                                _nl_c2 = _cn_c2[1]
-                                if _cond_c2 is None:
-                                    _const_nl = _nl_c2
-                                    break
-                                try:
-                                    _const_match = _cond_c2.eval(context)
-                                except Exception:
-                                    _const_match = None
-                                if _const_match:
-                                    _const_nl = _nl_c2
-                                    break
-                            if _const_nl is None:
-                                # No branch matches — always produces ""
-                                _ntags[j] = 0  # treat like TextNode
-                                _ntext[j] = ""
-                            else:
-                                # Check if the matching branch is pure text
-                                _cnl_nodes: list = _const_nl._nodes
-                                if len(_cnl_nodes) == 0:
-                                    _ntags[j] = 0
-                                    _ntext[j] = ""
-                                elif len(_cnl_nodes) == 1 and isinstance(_cnl_nodes[0], TextNode):
-                                    _cnl_tnode: TextNode = _cnl_nodes[0]
-                                    _ntags[j] = 0
-                                    _ntext[j] = _cnl_tnode.s
-                                else:
-                                    # Branch has dynamic content — tag 6 with NodeList
-                                    _ntags[j] = 6
-                                    _nattrs[j] = _const_nl
-                            continue  # skip LOOPIF classification below
-                        # Try to classify IfNode for LOOPIF optimization.
-                        # Conditions must be simple loopvar.attr boolean or
-                        # loopvar.attr <op> literal comparisons.
-                        # Tuple format: (attr, op, rhs, nodelist_or_None, text_or_None)
-                        # When text is not None, branch result is pre-computed (single TextNode).
-                        _if_nd: IfNode = _nd
-                        _conds_nls = _if_nd.conditions_nodelists
-                        _if_info: list = []
-                        _if_ok: cython.bint = True
-                        for _cn in _conds_nls:
-                            _cond = _cn[0]
-                            _nl = _cn[1]
-                            # Pre-extract text for single-TextNode branches
-                            _br_text = None
-                            _br_nl = _nl
-                            _br_nodes: list = _nl._nodes
-                            if len(_br_nodes) == 1 and isinstance(_br_nodes[0], TextNode):
-                                _br_tnode: TextNode = _br_nodes[0]
-                                _br_text = _br_tnode.s
-                                _br_nl = None  # don't need NodeList
-                            if _cond is None:
-                                # else clause — always matches
-                                _if_info.append((None, -1, None, _br_nl, _br_text))
-                            elif isinstance(_cond, TemplateLiteral):
-                                # Simple boolean: {% if book.attr %}
-                                _tl: TemplateLiteral = _cond
-                                _tl_fe: FilterExpression = _tl.value
-                                if _tl_fe.is_var and len(_tl_fe.filters) == 0:
-                                    _tl_var = _tl_fe.var
-                                    if not _tl_var.translate:
-                                        _tl_lk = _tl_var.lookups
-                                        if _tl_lk is not None and len(_tl_lk) == 2:
-                                            _tl_lkt: tuple = _tl_lk
-                                            if _tl_lkt[0] == loopvar0:
-                                                _if_info.append((_tl_lkt[1], -1, None, _br_nl, _br_text))
-                                                continue
-                                _if_ok = False
+                            try:
+                                _const_match = _cond_c2.eval(context)
+                            except Exception:
+                                _const_match = None
+                            if _const_match:
+                                _const_nl = _nl_c2
                                 break
-                            elif isinstance(_cond, Operator):
-                                # Comparison: {% if book.attr == literal %}
-                                _op: Operator = _cond
-                                _op_code: cython.int = _op.op_code
-                                if _op_code < OP_IS or _op_code > OP_LE:
-                                    _if_ok = False
-                                    break
-                                _op_first: TokenBase = _op.first
-                                _op_second: TokenBase = _op.second
-                                # First must be TemplateLiteral for loopvar.attr
-                                if not isinstance(_op_first, TemplateLiteral):
-                                    _if_ok = False
-                                    break
-                                _lhs_tl: TemplateLiteral = _op_first
-                                _lhs_fe: FilterExpression = _lhs_tl.value
-                                if not _lhs_fe.is_var or len(_lhs_fe.filters) != 0:
-                                    _if_ok = False
-                                    break
-                                _lhs_var = _lhs_fe.var
-                                if _lhs_var.translate:
-                                    _if_ok = False
-                                    break
-                                _lhs_lk = _lhs_var.lookups
-                                if _lhs_lk is None or len(_lhs_lk) != 2:
-                                    _if_ok = False
-                                    break
-                                _lhs_lkt: tuple = _lhs_lk
-                                if _lhs_lkt[0] != loopvar0:
-                                    _if_ok = False
-                                    break
-                                # Second must be TemplateLiteral with a literal value (no Variable lookup)
-                                if not isinstance(_op_second, TemplateLiteral):
-                                    _if_ok = False
-                                    break
-                                _rhs_tl: TemplateLiteral = _op_second
-                                _rhs_fe: FilterExpression = _rhs_tl.value
-                                if _rhs_fe.is_var:
-                                    _rhs_var = _rhs_fe.var
-                                    if _rhs_var.lookups is not None:
-                                        _if_ok = False
-                                        break
-                                    _rhs_val = _rhs_var.literal
-                                else:
-                                    _rhs_val = _rhs_fe.var
-                                if len(_rhs_fe.filters) != 0:
-                                    _if_ok = False
-                                    break
-                                _if_info.append((_lhs_lkt[1], _op_code, _rhs_val, _br_nl, _br_text))
-                            else:
-                                _if_ok = False
-                                break
-                        if _if_ok and len(_if_info) > 0:
-                            # Check if all conditions reference the same attr
-                            # (common for {% if x.a == 1 %}{% elif x.a == 2 %}...)
-                            # If so, resolve attr once and reuse for all comparisons.
-                            _same_attr = None
-                            _all_same: cython.bint = True
-                            for _ie in _if_info:
-                                _ie_attr = _ie[0]
-                                if _ie_attr is None:
-                                    continue  # else clause
-                                if _same_attr is None:
-                                    _same_attr = _ie_attr
-                                elif _ie_attr != _same_attr:
-                                    _all_same = False
-                                    break
-                            _ntags[j] = 5  # LOOPIF
-                            # Store (same_attr_or_None, conditions_list)
-                            if _all_same and _same_attr is not None:
-                                _nattrs[j] = (_same_attr, _if_info)
+                        if _const_nl is None:
+                            # No branch matches — always produces ""
+                            _ntags[j] = 0  # treat like TextNode
+                            _ntext[j] = ""
+                        else:
+                            # Check if the matching branch is pure text
+                            _cnl_text = _static_text(_const_nl._nodes)
+                            if _cnl_text is not None:
+                                _ntags[j] = 0
+                                _ntext[j] = _cnl_text
                             else:
-                                _nattrs[j] = (None, _if_info)
-
-            # Pre-classify CycleNode for LOOPCYCLE optimization (tag 7).
-            # For cycle nodes with pre-resolved literals and `as varname`,
-            # inline the modulo counter and context write.
-            # Skip LOOPCYCLE for CycleNodes that:
-            # 1. Have a matching ResetCycleNode in the loop body
-            # 2. Were already rendered before the loop (named cycle refs
-            #    like {% cycle abc %} which returns the same CycleNode
-            #    that was defined and rendered outside the loop)
-            if _ntags is not None:
-                # Scan the ENTIRE loop nodelist (including nested nodes)
-                # for ResetCycleNodes, since they may be inside IfNode etc.
-                _reset_cycle_targets: set = set()
-                for _rcn in self.nodelist_loop.get_nodes_by_type(ResetCycleNode):
-                    _reset_cycle_targets.add(_rcn.node)
-                for j in range(num_nodes):
-                    if _ntags[j] == 4 and isinstance(loop_nodes[j], CycleNode):
-                        _cyc_nd: CycleNode = loop_nodes[j]
-                        if _cyc_nd._preresolved is not None and _cyc_nd not in _reset_cycle_targets:
-                            # Skip if cycle was already rendered (counter != 0).
-                            # This catches named cycle refs ({% cycle abc %})
-                            # where the cycle was used before the loop.
-                            if context.render_context.get(_cyc_nd, 0) != 0:
-                                continue
+                                # Branch has dynamic content — tag 6 with NodeList
+                                _ntags[j] = 6
+                                _nattrs[j] = _const_nl
+                    elif _rtag == 11:
+                        # Skip LOOPCYCLE if the cycle was already rendered
+                        # (counter != 0). This catches named cycle refs
+                        # ({% cycle abc %}) used before the loop.
+                        if context.render_context.get(loop_nodes[j], 0) != 0:
+                            _ntags[j] = 4
+                        else:
                             _ntags[j] = 7  # LOOPCYCLE
-                            _nattrs[j] = _cyc_nd
+                            _nattrs[j] = loop_nodes[j]
 
-            # Post-process: flatten LOOPIF_CONST dynamic branches (tag 6)
-            # into individually classified nodes, then merge adjacent TEXT.
-            # Tag-6 entries call NodeList.render() per iteration; flattening
-            # lets each inner node benefit from LOOPATTR optimization.
-            if _ntags is not None:
-                _orig_nn: cython.Py_ssize_t = num_nodes
-                # Step 1: Flatten tag-6 entries.
+                # Post-process: flatten LOOPIF_CONST dynamic branches (tag 6)
+                # into individually classified nodes, then merge adjacent TEXT.
+                # Tag-6 entries call NodeList.render() per iteration; flattening
+                # lets each inner node benefit from LOOPATTR optimization.
                 _has_tag6: cython.bint = False
                 for j in range(num_nodes):
                     if _ntags[j] == 6:
@@ -772,7 +1158,7 @@ class ForNode(Node):
                                     _fvarc = _ffec.var
                                     _flkc = _fvarc.lookups if not _fvarc.translate else None
                                     if _flkc is not None and len(_flkc) >= 1:
-                                        if _flkc[0] == loopvar0 and len(_flkc) == 2:
+                                        if (_flkc[0] is loopvar0 or _flkc[0] == loopvar0) and len(_flkc) == 2:
                                             _flkt: tuple = _flkc
                                             _fnf: cython.Py_ssize_t = len(_ffec.filters)
                                             if _fnf == 0:
@@ -809,6 +1195,7 @@ class ForNode(Node):
                                             _f_done = True
                                         elif (
                                             _can_cache_consts
+                                            and _flkc[0] is not loopvar0
                                             and _flkc[0] != loopvar0
                                             and _flkc[0] != "forloop"
                                             and _flkc[0] not in _loop_written_vars
@@ -828,38 +1215,14 @@ class ForNode(Node):
                     _ntext = _new_text
                     loop_nodes = _new_nodes
                     num_nodes = len(_new_tags)
-                # Step 2: Merge adjacent TEXT (tag 0) nodes to reduce dispatch slots.
-                _prev_was_text: cython.bint = False
-                _has_adj_text: cython.bint = False
-                for j in range(num_nodes):
-                    if _ntags[j] == 0:
-                        if _prev_was_text:
-                            _has_adj_text = True
-                            break
-                        _prev_was_text = True
-                    else:
-                        _prev_was_text = False
-                if _has_adj_text:
-                    _m_tags: list = []
-                    _m_attrs: list = []
-                    _m_text: list = []
-                    _m_nodes: list = []
-                    for j in range(num_nodes):
-                        if _ntags[j] == 0 and len(_m_tags) > 0 and _m_tags[len(_m_tags) - 1] == 0:
-                            _m_text[len(_m_text) - 1] = _m_text[len(_m_text) - 1] + _ntext[j]
-                        else:
-                            _m_tags.append(_ntags[j])
-                            _m_attrs.append(_nattrs[j])
-                            _m_text.append(_ntext[j])
-                            _m_nodes.append(loop_nodes[j])
-                    _ntags = _m_tags
-                    _nattrs = _m_attrs
-                    _ntext = _m_text
-                    loop_nodes = _m_nodes
-                    num_nodes = len(_m_tags)
-                # Re-allocate output list if node count changed
-                if num_nodes != _orig_nn:
-                    nodelist = [None] * (len_values * num_nodes)
+                _ntags, _nattrs, _ntext, loop_nodes = _merge_text_slots(_ntags, _nattrs, _ntext, loop_nodes)
+                num_nodes = len(_ntags)
+            # Pre-allocate output list. Slots start out NULL rather than None
+            # and every path below fills each one exactly once via _set_slot().
+            nodelist: list = PyList_New(len_values * num_nodes)
+            # Rows actually rendered; fewer than len_values if the loop stopped early.
+            _n_rows: cython.Py_ssize_t = len_values
+            _pos: cython.Py_ssize_t
 
             # Create forloop context. CForloopContext computes
             # counter/revcounter/first/last on demand — no dict writes per iteration.
@@ -871,99 +1234,141 @@ class ForNode(Node):
                 # All non-TextNode nodes are direct loopvar VariableNodes.
                 # Pass item value directly via _render_var_with_value, bypassing
                 # the dict write + dict scan round-trip entirely.
-                for i, item in enumerate(values):
+                _kind_bytes: bytes = _node_kinds(loop_nodes)
+                _kind_ptr: cython.p_uchar = _kind_bytes
+                for i in range(len_values):
+                    # The loop body may shrink the list it iterates: stop
+                    # where Django's (reversed) list iterator would.
+                    _pos = len_values - 1 - i if rev else i
+                    if _pos >= len(values):
+                        _n_rows = i
+                        break
+                    item = values[_pos]
                     loop_ctx._i = i
                     for j in range(num_nodes):
                         inner_node = loop_nodes[j]
-                        if isinstance(inner_node, TextNode):
-                            inner_tnode: TextNode = inner_node
-                            nodelist[idx] = inner_tnode.s
+                        if _kind_ptr[j] == 0:
+                            _set_slot(nodelist, idx, cython.cast(TextNode, inner_node).s)
                         else:
-                            inner_vnode: VariableNode = inner_node
-                            nodelist[idx] = _render_var_with_value(inner_vnode.filter_expression, item, context)
+                            _set_slot(
+                                nodelist,
+                                idx,
+                                _render_var_with_value(
+                                    cython.cast(VariableNode, inner_node).filter_expression, item, context
+                                ),
+                            )
                         idx += 1
             elif _ntags is not None:
                 # OPTIMIZED LOOP: pre-classified LOOPATTR dispatch.
                 # For {{ book.attr }} patterns, resolve item[attr] directly
                 # instead of scanning context dicts via _render_var_fast.
                 _ae: cython.bint = context.autoescape
-                for i, item in enumerate(values):
+                # Language and float formatting mode are fixed for the whole
+                # loop; resolve them on first numeric LOOPATTR only.
+                _loop_lang = None
+                _loop_lang_set: cython.bint = False
+                _float_plain: cython.bint = False
+                # Subscriptability of the last seen item type; rows are
+                # usually homogeneous, so this is computed once per loop.
+                _last_itype = None
+                _item_subscriptable: cython.bint = True
+                # Tags packed into a byte string so the per-node dispatch reads
+                # a raw C byte instead of unboxing a list item.
+                _tag_bytes: bytes = bytes(_ntags)
+                _tag_ptr: cython.p_uchar = _tag_bytes
+                # Text slots hold the same string every iteration: write them
+                # in one stride per row and dispatch only over the rest.
+                _text_j: array.array = array.array("i")
+                _text_s: list = []
+                _dyn_j: array.array = array.array("i")
+                for j in range(num_nodes):
+                    if _tag_ptr[j] == 0:
+                        _text_j.append(j)
+                        _text_s.append(_ntext[j])
+                    else:
+                        _dyn_j.append(j)
+                _n_text: cython.Py_ssize_t = len(_text_s)
+                _n_dyn: cython.Py_ssize_t = len(_dyn_j)
+                _text_jp: cython.p_int = _text_j.data.as_ints
+                _dyn_jp: cython.p_int = _dyn_j.data.as_ints
+                _k: cython.Py_ssize_t
+                _base: cython.Py_ssize_t = 0
+                for i in range(len_values):
+                    # The loop body may shrink the list it iterates: stop
+                    # where Django's (reversed) list iterator would.
+                    _pos = len_values - 1 - i if rev else i
+                    if _pos >= len(values):
+                        _n_rows = i
+                        break
+                    item = values[_pos]
                     loop_ctx._i = i
                     top[loopvar0] = item
                     _item_is_dict: cython.bint = type(item) is dict
-                    for j in range(num_nodes):
-                        _tag: cython.int = _ntags[j]
-                        if _tag == 0:  # TextNode (or LOOPIF_CONST folded to text)
-                            nodelist[idx] = _ntext[j]
-                        elif _tag == 6:  # LOOPIF_CONST with dynamic branch
+                    if not _item_is_dict and type(item) is not _last_itype:
+                        _last_itype = type(item)
+                        _item_subscriptable = _type_is_subscriptable(_last_itype)
+                    for _k in range(_n_text):
+                        _set_slot(nodelist, _base + _text_jp[_k], _text_s[_k])
+                    for _k in range(_n_dyn):
+                        j = _dyn_jp[_k]
+                        idx = _base + j
+                        _tag: cython.int = _tag_ptr[j]
+                        # Cython lowers this chain on a C int to a C switch (a
+                        # jump table), so branch order does not matter here.
+                        if _tag == 6:  # LOOPIF_CONST with dynamic branch
                             _const_nl_r: NodeList = _nattrs[j]
-                            nodelist[idx] = _const_nl_r.render(context)
+                            _set_slot(nodelist, idx, _const_nl_r.render(context))
                         elif _tag == 2:  # LOOPATTR_NOFILTER
-                            if _item_is_dict:
-                                try:
-                                    _av = item[_nattrs[j]]
-                                except KeyError:
-                                    nodelist[idx] = loop_nodes[j].render(context)
-                                    idx += 1
-                                    continue
-                            else:
-                                try:
-                                    _av = item[_nattrs[j]]
-                                except (TypeError, KeyError, IndexError):
-                                    try:
-                                        _av = getattr(item, _nattrs[j])
-                                    except (TypeError, AttributeError):
-                                        nodelist[idx] = loop_nodes[j].render(context)
-                                        idx += 1
-                                        continue
+                            _av = _loop_row_value(item, _nattrs[j], _item_is_dict, _item_subscriptable)
+                            if _av is _RESOLVE_FALLBACK:
+                                _set_slot(nodelist, idx, loop_nodes[j].render(context))
+                                continue
                             if isinstance(_av, str):
                                 if _ae:
                                     if isinstance(_av, SafeData):
-                                        nodelist[idx] = _av
+                                        _set_slot(nodelist, idx, _av)
                                     else:
-                                        nodelist[idx] = _fast_escape_raw(_av)
+                                        _set_slot(nodelist, idx, _fast_escape_raw(_av))
                                 else:
-                                    nodelist[idx] = _av
-                            elif isinstance(_av, int) and not isinstance(_av, bool):
-                                _lang = _get_lang(context)
-                                nodelist[idx] = localize(_av, use_l10n=context.use_l10n, lang=_lang)
-                            elif isinstance(_av, float):
-                                _lang = _get_lang(context)
-                                if _float_is_str_fast(_lang):
-                                    nodelist[idx] = str(_av)
+                                    _set_slot(nodelist, idx, _av)
+                            elif (isinstance(_av, int) and not isinstance(_av, bool)) or isinstance(_av, float):
+                                if not _loop_lang_set:
+                                    _loop_lang = _get_lang(context)
+                                    _float_plain = _float_is_str_fast(_loop_lang)
+                                    _loop_lang_set = True
+                                if _float_plain and isinstance(_av, float):
+                                    _set_slot(nodelist, idx, str(_av))
                                 else:
-                                    nodelist[idx] = localize(_av, use_l10n=context.use_l10n, lang=_lang)
+                                    _set_slot(nodelist, idx, localize(_av, use_l10n=context.use_l10n, lang=_loop_lang))
                             elif callable(_av):
-                                nodelist[idx] = loop_nodes[j].render(context)
+                                _set_slot(nodelist, idx, loop_nodes[j].render(context))
                             else:
-                                nodelist[idx] = render_value_in_context(_av, context)
+                                _set_slot(nodelist, idx, render_value_in_context(_av, context))
                         elif _tag == 3:  # LOOPATTR_FILTER
-                            if _item_is_dict:
-                                try:
-                                    _av = item[_nattrs[j]]
-                                except KeyError:
-                                    nodelist[idx] = loop_nodes[j].render(context)
-                                    idx += 1
-                                    continue
-                            else:
-                                try:
-                                    _av = item[_nattrs[j]]
-                                except (TypeError, KeyError, IndexError):
-                                    try:
-                                        _av = getattr(item, _nattrs[j])
-                                    except (TypeError, AttributeError):
-                                        nodelist[idx] = loop_nodes[j].render(context)
-                                        idx += 1
-                                        continue
+                            _av = _loop_row_value(item, _nattrs[j], _item_is_dict, _item_subscriptable)
+                            if _av is _RESOLVE_FALLBACK:
+                                _set_slot(nodelist, idx, loop_nodes[j].render(context))
+                                continue
                             if callable(_av):
-                                nodelist[idx] = loop_nodes[j].render(context)
+                                _set_slot(nodelist, idx, loop_nodes[j].render(context))
                             else:
                                 _rvn: VariableNode = loop_nodes[j]
                                 result = _render_var_with_value(_rvn.filter_expression, _av, context)
                                 if result is not None:
-                                    nodelist[idx] = result
+                                    _set_slot(nodelist, idx, result)
                                 else:
-                                    nodelist[idx] = loop_nodes[j].render(context)
+                                    _set_slot(nodelist, idx, loop_nodes[j].render(context))
+                        elif _tag == 12:  # LOOPIF_BOOL_TT
+                            _bt: tuple = _nattrs[j]
+                            _bt_val = _loop_row_value(item, _bt[0], _item_is_dict, _item_subscriptable)
+                            if _bt_val is _RESOLVE_FALLBACK:
+                                _bt_val = None
+                            if callable(_bt_val):
+                                _set_slot(nodelist, idx, loop_nodes[j].render(context))
+                            elif _bt_val:
+                                _set_slot(nodelist, idx, _bt[1])
+                            else:
+                                _set_slot(nodelist, idx, _bt[2])
                         elif _tag == 5:  # LOOPIF
                             # Inline IfNode condition evaluation for loopvar.attr patterns.
                             # Resolves item[attr] directly instead of going through
@@ -974,26 +1379,15 @@ class ForNode(Node):
                             _if_matched: cython.bint = False
                             # If all conditions reference same attr, resolve once
                             if _if_same_attr is not None:
-                                if _item_is_dict:
-                                    try:
-                                        _if_val = item[_if_same_attr]
-                                    except KeyError:
-                                        _if_val = None
-                                else:
-                                    try:
-                                        _if_val = item[_if_same_attr]
-                                    except (TypeError, KeyError, IndexError):
-                                        try:
-                                            _if_val = getattr(item, _if_same_attr)
-                                        except (TypeError, AttributeError):
-                                            _if_val = None
+                                _if_val = _loop_row_value(item, _if_same_attr, _item_is_dict, _item_subscriptable)
+                                if _if_val is _RESOLVE_FALLBACK:
+                                    _if_val = None
                                 # Callable attrs must be invoked (Django's
                                 # _resolve_lookup calls them). Fall back to
                                 # generic render to handle do_not_call_in_templates,
                                 # alters_data, and TypeError/signature checks.
                                 if callable(_if_val):
-                                    nodelist[idx] = loop_nodes[j].render(context)
-                                    idx += 1
+                                    _set_slot(nodelist, idx, loop_nodes[j].render(context))
                                     continue
                                 for _if_entry in _if_info:
                                     _if_op: cython.int = _if_entry[1]
@@ -1003,38 +1397,17 @@ class ForNode(Node):
                                     if _if_entry[0] is None:
                                         # else clause
                                         if _if_br_text is not None:
-                                            nodelist[idx] = _if_br_text
+                                            _set_slot(nodelist, idx, _if_br_text)
                                         else:
-                                            nodelist[idx] = _if_br_nl.render(context)
+                                            _set_slot(nodelist, idx, _if_br_nl.render(context))
                                         _if_matched = True
                                         break
-                                    _cmp_ok: cython.bint = False
-                                    try:
-                                        if _if_op == -1:
-                                            _cmp_ok = _if_val
-                                        elif _if_op == OP_EQ:
-                                            _cmp_ok = _if_val == _if_rhs
-                                        elif _if_op == OP_NE:
-                                            _cmp_ok = _if_val != _if_rhs
-                                        elif _if_op == OP_GT:
-                                            _cmp_ok = _if_val > _if_rhs
-                                        elif _if_op == OP_GE:
-                                            _cmp_ok = _if_val >= _if_rhs
-                                        elif _if_op == OP_LT:
-                                            _cmp_ok = _if_val < _if_rhs
-                                        elif _if_op == OP_LE:
-                                            _cmp_ok = _if_val <= _if_rhs
-                                        elif _if_op == OP_IS:
-                                            _cmp_ok = _if_val is _if_rhs
-                                        elif _if_op == OP_IS_NOT:
-                                            _cmp_ok = _if_val is not _if_rhs
-                                    except Exception:
-                                        _cmp_ok = False
+                                    _cmp_ok: cython.bint = _loopif_compare(_if_val, _if_op, _if_rhs, _if_entry[5])
                                     if _cmp_ok:
                                         if _if_br_text is not None:
-                                            nodelist[idx] = _if_br_text
+                                            _set_slot(nodelist, idx, _if_br_text)
                                         else:
-                                            nodelist[idx] = _if_br_nl.render(context)
+                                            _set_slot(nodelist, idx, _if_br_nl.render(context))
                                         _if_matched = True
                                         break
                             else:
@@ -1047,97 +1420,81 @@ class ForNode(Node):
                                     _if_br_text = _if_entry[4]
                                     if _if_attr is None:
                                         if _if_br_text is not None:
-                                            nodelist[idx] = _if_br_text
+                                            _set_slot(nodelist, idx, _if_br_text)
                                         else:
-                                            nodelist[idx] = _if_br_nl.render(context)
+                                            _set_slot(nodelist, idx, _if_br_nl.render(context))
                                         _if_matched = True
                                         break
-                                    if _item_is_dict:
-                                        try:
-                                            _if_val = item[_if_attr]
-                                        except KeyError:
-                                            _if_val = None
-                                    else:
-                                        try:
-                                            _if_val = item[_if_attr]
-                                        except (TypeError, KeyError, IndexError):
-                                            try:
-                                                _if_val = getattr(item, _if_attr)
-                                            except (TypeError, AttributeError):
-                                                _if_val = None
+                                    _if_val = _loop_row_value(item, _if_attr, _item_is_dict, _item_subscriptable)
+                                    if _if_val is _RESOLVE_FALLBACK:
+                                        _if_val = None
                                     # Callable attrs: fall back to generic render
                                     if callable(_if_val):
-                                        nodelist[idx] = loop_nodes[j].render(context)
+                                        _set_slot(nodelist, idx, loop_nodes[j].render(context))
                                         _if_matched = True
                                         break
-                                    _cmp_ok = False
-                                    try:
-                                        if _if_op == -1:
-                                            _cmp_ok = _if_val
-                                        elif _if_op == OP_EQ:
-                                            _cmp_ok = _if_val == _if_rhs
-                                        elif _if_op == OP_NE:
-                                            _cmp_ok = _if_val != _if_rhs
-                                        elif _if_op == OP_GT:
-                                            _cmp_ok = _if_val > _if_rhs
-                                        elif _if_op == OP_GE:
-                                            _cmp_ok = _if_val >= _if_rhs
-                                        elif _if_op == OP_LT:
-                                            _cmp_ok = _if_val < _if_rhs
-                                        elif _if_op == OP_LE:
-                                            _cmp_ok = _if_val <= _if_rhs
-                                        elif _if_op == OP_IS:
-                                            _cmp_ok = _if_val is _if_rhs
-                                        elif _if_op == OP_IS_NOT:
-                                            _cmp_ok = _if_val is not _if_rhs
-                                    except Exception:
-                                        _cmp_ok = False
+                                    _cmp_ok = _loopif_compare(_if_val, _if_op, _if_rhs, _if_entry[5])
                                     if _cmp_ok:
                                         if _if_br_text is not None:
-                                            nodelist[idx] = _if_br_text
+                                            _set_slot(nodelist, idx, _if_br_text)
                                         else:
-                                            nodelist[idx] = _if_br_nl.render(context)
+                                            _set_slot(nodelist, idx, _if_br_nl.render(context))
                                         _if_matched = True
                                         break
                             if not _if_matched:
-                                nodelist[idx] = ""
+                                _set_slot(nodelist, idx, "")
                         elif _tag == 7:  # LOOPCYCLE
                             # Inline CycleNode: modulo counter on pre-resolved tuple.
                             # Avoids render_context dict lookup + itertools_cycle.
                             _cyc: CycleNode = _nattrs[j]
-                            _cyc_val = _cyc._preresolved[i % _cyc._n]
+                            _cyc_k: cython.Py_ssize_t = i % _cyc._n
                             if _cyc.variable_name:
                                 # Write to top dict directly (avoids set_upward's
                                 # O(n_dicts) scan — cycle var is always in top dict)
-                                top[_cyc.variable_name] = _cyc_val
-                            if _ae and _cyc._needs_escape and not isinstance(_cyc_val, SafeData):
-                                nodelist[idx] = escape(_cyc_val)
+                                top[_cyc.variable_name] = _cyc._preresolved[_cyc_k]
+                            # Escaped once at parse time; same tuple when nothing
+                            # needs escaping.
+                            if _ae:
+                                _set_slot(nodelist, idx, _cyc._escaped_preresolved[_cyc_k])
                             else:
-                                nodelist[idx] = _cyc_val
+                                _set_slot(nodelist, idx, _cyc._preresolved[_cyc_k])
                         elif _tag == 8:  # FORLOOP_COUNTER
                             _fl_code: cython.int = _nattrs[j]
                             if _fl_code >= 0:
-                                nodelist[idx] = str(i + _fl_code)
+                                _set_slot(nodelist, idx, str(i + _fl_code))
                             elif _fl_code == -1:
-                                nodelist[idx] = str(len_values - i)
+                                _set_slot(nodelist, idx, str(len_values - i))
                             else:
-                                nodelist[idx] = str(len_values - i - 1)
+                                _set_slot(nodelist, idx, str(len_values - i - 1))
                         elif _tag == 1:  # VariableNode
                             _rvn2: VariableNode = loop_nodes[j]
                             result = _render_var_fast(_rvn2.filter_expression, context)
                             if result is not None:
-                                nodelist[idx] = result
+                                _set_slot(nodelist, idx, result)
                             else:
-                                nodelist[idx] = loop_nodes[j].render(context)
+                                _set_slot(nodelist, idx, loop_nodes[j].render(context))
                         else:  # Other node
-                            nodelist[idx] = loop_nodes[j].render(context)
-                        idx += 1
+                            _set_slot(nodelist, idx, loop_nodes[j].render(context))
+                    _base += num_nodes
             else:
-                for i, item in enumerate(values):
+                _kind_bytes = _node_kinds(loop_nodes)
+                _kind_ptr = _kind_bytes
+                for i in range(len_values):
+                    # The loop body may shrink the list it iterates: stop
+                    # where Django's (reversed) list iterator would.
+                    _pos = len_values - 1 - i if rev else i
+                    if _pos >= len(values):
+                        _n_rows = i
+                        break
+                    item = values[_pos]
                     loop_ctx._i = i
 
                     pop_context = False
-                    if unpack:
+                    if num_loopvars == 2 and type(item) is tuple and len(item) == 2:
+                        # {% for k, v in d.items %}: build the scope directly.
+                        _dicts.append({pair_k: cython.cast(tuple, item)[0], pair_v: cython.cast(tuple, item)[1]})
+                        pop_context = True
+                    elif unpack:
                         # If there are multiple loop variables, unpack the item
                         # into them.
                         try:
@@ -1160,31 +1517,39 @@ class ForNode(Node):
                     if not debug:
                         for j in range(num_nodes):
                             inner_node = loop_nodes[j]
-                            if isinstance(inner_node, TextNode):
-                                inner_tnode = inner_node
-                                nodelist[idx] = inner_tnode.s
-                            elif isinstance(inner_node, VariableNode):
-                                inner_vnode = inner_node
-                                result = _render_var_fast(inner_vnode.filter_expression, context)
+                            _kind: cython.int = _kind_ptr[j]
+                            if _kind == 0:
+                                _set_slot(nodelist, idx, cython.cast(TextNode, inner_node).s)
+                            elif _kind == 1:
+                                result = _render_var_fast(
+                                    cython.cast(VariableNode, inner_node).filter_expression, context
+                                )
                                 if result is not None:
-                                    nodelist[idx] = result
+                                    _set_slot(nodelist, idx, result)
                                 else:
-                                    nodelist[idx] = inner_node.render(context)
+                                    _set_slot(nodelist, idx, inner_node.render(context))
                             else:
-                                nodelist[idx] = inner_node.render(context)
+                                _set_slot(nodelist, idx, inner_node.render(context))
                             idx += 1
                     else:
                         for j in range(num_nodes):
-                            nodelist[idx] = loop_nodes[j].render_annotated(context)
+                            _set_slot(nodelist, idx, loop_nodes[j].render_annotated(context))
                             idx += 1
 
                     if pop_context:
                         _dicts.pop()
+            if _n_rows < len_values:
+                # Drop the slots of the rows never rendered, still NULL.
+                del nodelist[_n_rows * num_nodes :]
         finally:
             context.dicts.pop()
         return SafeString("".join(nodelist))
 
 
+# Marks an {% ifchanged %} that has not rendered yet in the current loop.
+_IFCHANGED_UNSET = object()
+
+
 @cython.cclass
 class IfChangedNode(Node):
     nodelist_true = cython.declare(object, visibility="public")
@@ -1201,19 +1566,28 @@ class IfChangedNode(Node):
     def render(self, context: Context):
         # Init state storage
         state_frame = self._get_context_stack_frame(context)
-        state_frame.setdefault(self)
+        prev = state_frame.setdefault(self, _IFCHANGED_UNSET)
 
         nodelist_true_output = None
-        if self._varlist:
+        changed: cython.bint
+        if len(self._varlist) == 1:
+            # Single variable: compare the value itself rather than a
+            # one-element list, with the same identity-then-equality test
+            # list comparison applies per element.
+            compare_to = self._varlist[0].resolve(context, ignore_failures=True)
+            changed = prev is _IFCHANGED_UNSET or not (compare_to is prev or compare_to == prev)
+        elif self._varlist:
             # Consider multiple parameters. This behaves like an OR evaluation
             # of the multiple variables.
             compare_to = [var.resolve(context, ignore_failures=True) for var in self._varlist]
+            changed = compare_to != prev
         else:
             # The "{% ifchanged %}" syntax (without any variables) compares
             # the rendered output.
             compare_to = nodelist_true_output = self.nodelist_true.render(context)
+            changed = compare_to is not prev and compare_to != prev
 
-        if compare_to != state_frame[self]:
+        if changed:
             state_frame[self] = compare_to
             # render true block if not already rendered
             return nodelist_true_output or self.nodelist_true.render(context)
@@ -1237,12 +1611,32 @@ class IfChangedNode(Node):
             return context.render_context
 
 
+@cython.cfunc
+def _if_cond_kind(cond) -> cython.int:
+    if cond is None:
+        return 0
+    if type(cond) is Operator:
+        return 1
+    if isinstance(cond, TokenBase):
+        return 2
+    return 3
+
+
 @cython.cclass
 class IfNode(Node):
     conditions_nodelists = cython.declare(list, visibility="public")
+    # conditions_nodelists split into parallel lists, plus one byte per
+    # branch: 0=else, 1=Operator (its eval already swallows exceptions, so
+    # no try block is needed), 2=other TokenBase (C-level eval), 3=anything else.
+    _conds = cython.declare(list)
+    _nodelists = cython.declare(list)
+    _cond_kinds = cython.declare(bytes)
 
     def __init__(self, conditions_nodelists):
         self.conditions_nodelists = conditions_nodelists
+        self._conds = [c for c, _ in conditions_nodelists]
+        self._nodelists = [nl for _, nl in conditions_nodelists]
+        self._cond_kinds = bytes([_if_cond_kind(c) for c in self._conds])
 
     def __repr__(self):
         return "<%s>" % self.__class__.__name__
@@ -1258,29 +1652,26 @@ class IfNode(Node):
     @cython.ccall
     def render(self, context: Context):
         match: object
-        conditions_nodelists = self.conditions_nodelists
-        # Fast path: single {% if %} with no elif/else (the common case).
-        if len(conditions_nodelists) == 1:
-            condition, nodelist = conditions_nodelists[0]
-            try:
-                match = condition.eval(context)
-            except VariableDoesNotExist:
-                match = None
-            if match:
-                return nodelist.render(context)
-            return ""
-
-        for condition, nodelist in conditions_nodelists:
-            if condition is not None:  # if / elif clause
+        conds: list = self._conds
+        kinds: cython.p_uchar = self._cond_kinds
+        kind: cython.uchar
+        i: cython.Py_ssize_t
+        for i in range(len(conds)):
+            kind = kinds[i]
+            if kind == 0:  # else clause
+                return self._nodelists[i].render(context)
+            if kind == 1:
+                match = cython.cast(Operator, conds[i]).eval(context)
+            else:
                 try:
-                    match = condition.eval(context)
+                    if kind == 2:
+                        match = cython.cast(TokenBase, conds[i]).eval(context)
+                    else:
+                        match = conds[i].eval(context)
                 except VariableDoesNotExist:
                     match = None
-            else:  # else clause
-                match = True
-
             if match:
-                return nodelist.render(context)
+                return self._nodelists[i].render(context)
 
         return ""
 
@@ -1314,6 +1705,25 @@ class LoremNode(Node):
 GroupedResult = namedtuple("GroupedResult", ["grouper", "list"])
 
 
+@cython.cclass
+class _RegroupKey:
+    """groupby() key for RegroupNode; same as RegroupNode.resolve_expression
+    without a closure cell and method lookup per row."""
+
+    expression = cython.declare(FilterExpression)
+    context = cython.declare(Context)
+    var_name = cython.declare(object)
+
+    def __init__(self, expression: FilterExpression, context: Context, var_name):
+        self.expression = expression
+        self.context = context
+        self.var_name = var_name
+
+    def __call__(self, obj):
+        self.context[self.var_name] = obj
+        return self.expression.resolve(self.context, ignore_failures=True)
+
+
 @cython.cclass
 class RegroupNode(Node):
     target = cython.declare(object, visibility="public")
@@ -1333,11 +1743,10 @@ class RegroupNode(Node):
         return self.expression.resolve(context, ignore_failures=True)
 
     def _group_objects(self, obj_list, context):
-        # Separate method because lambdas (closures) aren't allowed in cpdef.
-        return [
-            GroupedResult(grouper=key, list=list(val))
-            for key, val in groupby(obj_list, lambda obj: self.resolve_expression(obj, context))
-        ]
+        grouped = []
+        for key, val in groupby(obj_list, _RegroupKey(self.expression, context, self.var_name)):
+            grouped.append(GroupedResult(grouper=key, list=list(val)))
+        return grouped
 
     @cython.ccall
     def render(self, context: Context):
@@ -1361,6 +1770,17 @@ class LoadNode(Node):
         return ""
 
 
+# settings.USE_TZ, read once (None until then); reset by override_settings.
+_now_use_tz: object = None
+
+
+@receiver(setting_changed, dispatch_uid="dtc_now_use_tz")
+def _reset_now_use_tz(sender, setting, **kwargs):
+    global _now_use_tz
+    if setting == "USE_TZ":
+        _now_use_tz = None
+
+
 @cython.cclass
 class NowNode(Node):
     format_string = cython.declare(object, visibility="public")
@@ -1372,7 +1792,11 @@ class NowNode(Node):
 
     @cython.ccall
     def render(self, context: Context):
-        tzinfo = timezone.get_current_timezone() if settings.USE_TZ else None
+        global _now_use_tz
+        use_tz = _now_use_tz
+        if use_tz is None:
+            use_tz = _now_use_tz = bool(settings.USE_TZ)
+        tzinfo = timezone.get_current_timezone() if use_tz else None
         formatted = date(datetime.now(tz=tzinfo), self.format_string)
 
         if self.asvar:
@@ -1402,16 +1826,24 @@ class PartialDefNode(Node):
 class PartialNode(Node):
     partial_name = cython.declare(object, visibility="public")
     partial_mapping = cython.declare(object, visibility="public")
+    # partial_mapping[partial_name], cached on the first successful lookup;
+    # the mapping is complete once the template has been parsed.
+    _resolved = cython.declare(object)
 
     def __init__(self, partial_name, partial_mapping):
         # Defer lookup in `partial_mapping` and nodelist to runtime.
         self.partial_name = partial_name
         self.partial_mapping = partial_mapping
+        self._resolved = None
 
     @cython.ccall
     def render(self, context: Context):
+        # The KeyError handler also covers render(), as in Django.
         try:
-            return self.partial_mapping[self.partial_name].render(context)
+            partial = self._resolved
+            if partial is None:
+                partial = self._resolved = self.partial_mapping[self.partial_name]
+            return partial.render(context)
         except KeyError:
             raise TemplateSyntaxError(f"Partial '{self.partial_name}' is not defined in the current template.")
 
@@ -1438,8 +1870,6 @@ class SpacelessNode(Node):
 
     @cython.ccall
     def render(self, context: Context):
-        from django.utils.html import strip_spaces_between_tags
-
         return strip_spaces_between_tags(self.nodelist.render(context).strip())
 
 
@@ -1457,12 +1887,44 @@ class TemplateTagNode(Node):
         "closecomment": COMMENT_TAG_END,
     }
 
+    _out = cython.declare(object)
+
     def __init__(self, tagtype):
         self.tagtype = tagtype
+        self._out = SafeString(self.mapping.get(tagtype, ""))
 
     @cython.ccall
     def render(self, context: Context):
-        return self.mapping.get(self.tagtype, "")
+        return self._out
+
+
+# reverse() results for {% url %} calls whose arguments are all plain str/int
+# (anything else may stringify differently while comparing equal, e.g. True
+# and 1, or a model instance whose __str__ changes). The resolver for the
+# thread-local urlconf, the script prefix and the language are part of the key
+# because reverse() reads them. Keying on the resolver object rather than the
+# urlconf name means clear_url_caches(), which replaces the resolver, also
+# invalidates these entries.
+@lru_cache(maxsize=4096)
+def _cached_reverse(view_name, args, kwargs, current_app, resolver, script_prefix, language):
+    from django.urls import reverse
+
+    return reverse(view_name, args=args, kwargs=dict(kwargs), current_app=current_app)
+
+
+@receiver(setting_changed, dispatch_uid="dtc_url_reverse_cache")
+def _reset_reverse_cache(sender, setting, **kwargs):
+    if setting == "ROOT_URLCONF":
+        _cached_reverse.cache_clear()
+
+
+@cython.cfunc
+def _reverse_key_ok(values) -> cython.bint:
+    for v in values:
+        tp = type(v)
+        if tp is not str and tp is not SafeString and tp is not int:
+            return False
+    return True
 
 
 @cython.cclass
@@ -1490,7 +1952,7 @@ class URLNode(Node):
 
     @cython.ccall
     def render(self, context: Context):
-        from django.urls import NoReverseMatch, reverse
+        from django.urls import NoReverseMatch, get_resolver, get_script_prefix, get_urlconf, reverse
 
         args = [arg.resolve(context) for arg in self.args]
         kwargs = {k: v.resolve(context) for k, v in self.kwargs.items()}
@@ -1506,7 +1968,23 @@ class URLNode(Node):
         # {% url ... as var %} construct is used, in which case return nothing.
         url = ""
         try:
-            url = reverse(view_name, args=args, kwargs=kwargs, current_app=current_app)
+            if (
+                _reverse_key_ok((view_name,))
+                and (current_app is None or type(current_app) is str)
+                and _reverse_key_ok(args)
+                and _reverse_key_ok(kwargs.values())
+            ):
+                url = _cached_reverse(
+                    view_name,
+                    tuple(args),
+                    frozenset(kwargs.items()),
+                    current_app,
+                    get_resolver(get_urlconf()),
+                    get_script_prefix(),
+                    get_language(),
+                )
+            else:
+                url = reverse(view_name, args=args, kwargs=kwargs, current_app=current_app)
         except NoReverseMatch:
             if self.asvar is None:
                 raise
@@ -1525,7 +2003,7 @@ class VerbatimNode(Node):
     content = cython.declare(object, visibility="public")
 
     def __init__(self, content):
-        self.content = content
+        self.content = SafeString(content)
 
     @cython.ccall
     def render(self, context: Context):
@@ -1555,11 +2033,30 @@ class WidthRatioNode(Node):
             return ""
         except (ValueError, TypeError):
             raise TemplateSyntaxError("widthratio final argument must be a number")
+        v: cython.double
+        mx: cython.double
+        ratio: cython.double
         try:
-            value = float(value)
-            max_value = float(max_value)
-            ratio = (value / max_value) * max_width
-            result = str(round(ratio))
+            if (type(value) is float or type(value) is int) and (type(max_value) is float or type(max_value) is int):
+                # Same arithmetic in C doubles; rint() rounds half to even
+                # like round(). int -> double conversion raises OverflowError
+                # just like float().
+                v = value
+                mx = max_value
+                if mx == 0.0:
+                    raise ZeroDivisionError
+                ratio = (v / mx) * cython.cast(cython.double, max_width)
+                if not isfinite(ratio):
+                    raise OverflowError
+                if fabs(ratio) < 4e18:
+                    result = str(cython.cast(cython.longlong, rint(ratio)))
+                else:
+                    result = str(round(ratio))
+            else:
+                value = float(value)
+                max_value = float(max_value)
+                ratio = (value / max_value) * max_width
+                result = str(round(ratio))
         except ZeroDivisionError:
             result = "0"
         except (ValueError, TypeError, OverflowError):
@@ -1576,6 +2073,10 @@ class WidthRatioNode(Node):
 class WithNode(Node):
     nodelist = cython.declare(object, visibility="public")
     extra_context = cython.declare(dict, visibility="public")
+    # {% with foo=bar %} is by far the common shape; its pair is kept apart.
+    _n_extra = cython.declare(cython.int)
+    _sole_key = cython.declare(object)
+    _sole_val = cython.declare(object)
 
     def __init__(self, var, name, nodelist, extra_context=None):
         self.nodelist = nodelist
@@ -1584,15 +2085,26 @@ class WithNode(Node):
         self.extra_context = extra_context or {}
         if name:
             self.extra_context[name] = var
+        self._n_extra = len(self.extra_context)
+        if self._n_extra == 1:
+            self._sole_key, self._sole_val = next(iter(self.extra_context.items()))
 
     def __repr__(self):
         return "<%s>" % self.__class__.__name__
 
     @cython.ccall
     def render(self, context: Context):
-        values = {key: val.resolve(context) for key, val in self.extra_context.items()}
-        with context.push(**values):
+        # Push the resolved dict as-is rather than through push(**values),
+        # which would copy it twice more.
+        if self._n_extra == 1:
+            values = {self._sole_key: self._sole_val.resolve(context)}
+        else:
+            values = {key: val.resolve(context) for key, val in self.extra_context.items()}
+        context.push_scope(values)
+        try:
             return self.nodelist.render(context)
+        finally:
+            context.pop_scope()
 
 
 @register.tag
@@ -1696,15 +2208,16 @@ def cycle(parser, token):
             as_form = True
             silent = False
 
+    compile_filter = parser.compile_filter
     if as_form:
         name = args[-1]
-        values = [parser.compile_filter(arg) for arg in args[1:-2]]
+        values = [compile_filter(arg) for arg in args[1:-2]]
         node = CycleNode(values, name, silent=silent)
         if not hasattr(parser, "_named_cycle_nodes"):
             parser._named_cycle_nodes = {}
         parser._named_cycle_nodes[name] = node
     else:
-        values = [parser.compile_filter(arg) for arg in args[1:]]
+        values = [compile_filter(arg) for arg in args[1:]]
         node = CycleNode(values)
     parser._last_cycle_node = node
     return node
@@ -1807,7 +2320,14 @@ def firstof(parser, token):
     if len(bits) >= 2 and bits[-2] == "as":
         asvar = bits[-1]
         bits = bits[:-2]
-    return FirstOfNode([parser.compile_filter(bit) for bit in bits], asvar)
+    compile_filter = parser.compile_filter
+    return FirstOfNode([compile_filter(bit) for bit in bits], asvar)
+
+
+# Separator between {% for %} loop variables, and characters a loop
+# variable may not contain.
+_FOR_LOOPVAR_SPLIT_RE = re.compile(r" *, *")
+_FOR_LOOPVAR_INVALID_RE = re.compile("[ \"'%s]" % re.escape(FILTER_SEPARATOR))
 
 
 @register.tag("for")
@@ -1874,19 +2394,24 @@ def do_for(parser, token):
                                  current one
         =======================  ==============================================
     """
-    bits = token.split_contents()
-    if len(bits) < 4:
+    bits: list = token.split_contents()
+    n_bits: cython.Py_ssize_t = len(bits)
+    if n_bits < 4:
         raise TemplateSyntaxError("'for' statements should have at least four words: %s" % token.contents)
 
-    is_reversed = bits[-1] == "reversed"
-    in_index = -3 if is_reversed else -2
+    # Positive C indices: typed list indexing compiles to direct item access.
+    is_reversed = bits[n_bits - 1] == "reversed"
+    in_index: cython.Py_ssize_t = n_bits - 3 if is_reversed else n_bits - 2
     if bits[in_index] != "in":
         raise TemplateSyntaxError("'for' statements should use the format 'for x in y': %s" % token.contents)
 
-    invalid_chars = frozenset((" ", '"', "'", FILTER_SEPARATOR))
-    loopvars = re.split(r" *, *", " ".join(bits[1:in_index]))
+    if in_index == 2 and "," not in bits[1]:
+        # {% for x in seq %}: nothing to join or split.
+        loopvars = [bits[1]]
+    else:
+        loopvars = _FOR_LOOPVAR_SPLIT_RE.split(" ".join(bits[1:in_index]))
     for var in loopvars:
-        if not var or not invalid_chars.isdisjoint(var):
+        if not var or _FOR_LOOPVAR_INVALID_RE.search(var):
             raise TemplateSyntaxError("'for' tag received an invalid argument: %s" % token.contents)
 
     sequence = parser.compile_filter(bits[in_index + 1])
@@ -1922,10 +2447,13 @@ class TemplateLiteral(Literal):
 
     @cython.ccall
     def eval(self, context: Context):
-        result = _resolve_fe_raw(self.value, context)
+        # value is declared object on TokenBase; type it once so both the raw
+        # lookup and resolve() are direct C calls.
+        fe: FilterExpression = self.value
+        result = _resolve_fe_raw(fe, context)
         if result is not _RESOLVE_FALLBACK:
             return result
-        return self.value.resolve(context, ignore_failures=True)
+        return fe.resolve(context, True)
 
 
 class TemplateIfParser(IfParser):
@@ -1939,6 +2467,21 @@ class TemplateIfParser(IfParser):
         return TemplateLiteral(self.template_parser.compile_filter(value), value)
 
 
+def _parse_if_condition(parser, bits):
+    # Repeated conditions in one template ({% if user.is_authenticated %})
+    # share a single parsed tree; condition trees are never mutated after
+    # parsing. The cache lives on the parser, so it never outlives the
+    # template's filter set.
+    cache = getattr(parser, "_if_conditions", None)
+    if cache is None:
+        return TemplateIfParser(parser, bits).parse()
+    key = tuple(bits)
+    condition = cache.get(key)
+    if condition is None:
+        condition = cache[key] = TemplateIfParser(parser, bits).parse()
+    return condition
+
+
 @register.tag("if")
 def do_if(parser, token):
     """
@@ -2000,7 +2543,7 @@ def do_if(parser, token):
     """
     # {% if ... %}
     bits = token.split_contents()[1:]
-    condition = TemplateIfParser(parser, bits).parse()
+    condition = _parse_if_condition(parser, bits)
     nodelist = parser.parse(("elif", "else", "endif"))
     conditions_nodelists = [(condition, nodelist)]
     token = parser.next_token()
@@ -2008,7 +2551,7 @@ def do_if(parser, token):
     # {% elif ... %} (repeatable)
     while token.contents.startswith("elif"):
         bits = token.split_contents()[1:]
-        condition = TemplateIfParser(parser, bits).parse()
+        condition = _parse_if_condition(parser, bits)
         nodelist = parser.parse(("elif", "else", "endif"))
         conditions_nodelists.append((condition, nodelist))
         token = parser.next_token()
@@ -2064,14 +2607,14 @@ def ifchanged(parser, token):
         parser.delete_first_token()
     else:
         nodelist_false = NodeList()
-    values = [parser.compile_filter(bit) for bit in bits[1:]]
+    compile_filter = parser.compile_filter
+    values = [compile_filter(bit) for bit in bits[1:]]
     return IfChangedNode(nodelist_true, nodelist_false, *values)
 
 
 def find_library(parser, name):
-    try:
-        return parser.libraries[name]
-    except KeyError:
+    library = parser.libraries.get(name)
+    if library is None:
         raise TemplateSyntaxError(
             "'%s' is not a registered tag library. Must be one of:\n%s"
             % (
@@ -2079,6 +2622,7 @@ def find_library(parser, name):
                 "\n".join(sorted(parser.libraries)),
             ),
         )
+    return library
 
 
 def load_from_library(library, label, names):
@@ -2086,15 +2630,16 @@ def load_from_library(library, label, names):
     Return a subset of tags and filters from a library.
     """
     subset = Library()
+    tags = library.tags
+    filters = library.filters
     for name in names:
-        found = False
-        if name in library.tags:
-            found = True
-            subset.tags[name] = library.tags[name]
-        if name in library.filters:
-            found = True
-            subset.filters[name] = library.filters[name]
-        if found is False:
+        tag = tags.get(name)
+        if tag is not None:
+            subset.tags[name] = tag
+        filter_func = filters.get(name)
+        if filter_func is not None:
+            subset.filters[name] = filter_func
+        if tag is None and filter_func is None:
             raise TemplateSyntaxError(
                 "'%s' is not a valid tag or filter in tag library '%s'"
                 % (
@@ -2162,24 +2707,29 @@ def lorem(parser, token):
       and two random paragraphs each wrapped in HTML ``<p>`` tags
     * ``{% lorem 2 w random %}`` outputs two random latin words
     """
-    bits = list(token.split_contents())
+    bits = token.split_contents()
     tagname = bits[0]
+    # Consume optional bits from the right by moving an end index instead
+    # of popping a list copy.
+    end = len(bits)
     # Random bit
-    common = bits[-1] != "random"
+    common = bits[end - 1] != "random"
     if not common:
-        bits.pop()
+        end -= 1
     # Method bit
-    if bits[-1] in ("w", "p", "b"):
-        method = bits.pop()
+    if bits[end - 1] in ("w", "p", "b"):
+        method = bits[end - 1]
+        end -= 1
     else:
         method = "b"
     # Count bit
-    if len(bits) > 1:
-        count = bits.pop()
+    if end > 1:
+        count = bits[end - 1]
+        end -= 1
     else:
         count = "1"
     count = parser.compile_filter(count)
-    if len(bits) != 1:
+    if end != 1:
         raise TemplateSyntaxError("Incorrect format for %r tag" % tagname)
     return LoremNode(count, method, common)
 
@@ -2283,13 +2833,22 @@ def partial_func(parser, token):
     bits = token.split_contents()
     if len(bits) == 2:
         partial_name = bits[1]
-        extra_data = parser.extra_data
-        partial_mapping = DeferredSubDict(extra_data, "partials")
+        # One view of extra_data["partials"] is shared by every {% partial %}
+        # in the template. It is kept on the parser rather than in extra_data,
+        # which ends up on the template as public data.
+        partial_mapping = getattr(parser, "_partial_mapping", None)
+        if partial_mapping is None:
+            partial_mapping = parser._partial_mapping = DeferredSubDict(parser.extra_data, "partials")
         return PartialNode(partial_name, partial_mapping=partial_mapping)
     else:
         raise TemplateSyntaxError("'partial' tag requires a single argument")
 
 
+# Multi-value types checked before falling back to the Iterable ABC, whose
+# isinstance() goes through the ABC machinery; strings skip it entirely.
+_QS_MULTI_TYPES = (list, tuple, set, frozenset)
+
+
 @register.simple_tag(name="querystring", takes_context=True)
 def querystring(context, *args, **kwargs):
     """
@@ -2333,7 +2892,8 @@ def querystring(context, *args, **kwargs):
         args = [context.request.GET]
     params = QueryDict(mutable=True)
     for d in [*args, kwargs]:
-        if not isinstance(d, Mapping):
+        # dict (QueryDict included) first: the Mapping ABC check is slow.
+        if not isinstance(d, dict) and not isinstance(d, Mapping):
             raise TemplateSyntaxError("querystring requires mappings for positional arguments (got %r instead)." % d)
         items = d.lists() if isinstance(d, QueryDict) else d.items()
         for key, value in items:
@@ -2341,7 +2901,7 @@ def querystring(context, *args, **kwargs):
                 raise TemplateSyntaxError("querystring requires strings for mapping keys (got %r instead)." % key)
             if value is None:
                 params.pop(key, None)
-            elif isinstance(value, Iterable) and not isinstance(value, str):
+            elif isinstance(value, _QS_MULTI_TYPES) or (not isinstance(value, str) and isinstance(value, Iterable)):
                 # Drop None values; if no values remain, the key is removed.
                 params.setlist(key, [v for v in value if v is not None])
             else:
@@ -2567,15 +3127,16 @@ def url(parser, token):
         asvar = bits[-1]
         bits = bits[:-2]
 
+    compile_filter = parser.compile_filter
     for bit in bits:
         match = kwarg_re.match(bit)
         if not match:
             raise TemplateSyntaxError("Malformed arguments to url tag")
         name, value = match.groups()
         if name:
-            kwargs[name] = parser.compile_filter(value)
+            kwargs[name] = compile_filter(value)
         else:
-            args.append(parser.compile_filter(value))
+            args.append(compile_filter(value))
 
     return URLNode(viewname, args, kwargs, asvar)
 
@@ -1,3 +1,4 @@
+import codecs
 import functools
 
 from django.core.exceptions import ImproperlyConfigured
@@ -109,6 +110,12 @@ class Engine:
         context_processors += tuple(self.context_processors)
         return tuple(import_string(path) for path in context_processors)
 
+    @cached_property
+    def _file_decoder(self):
+        # Resolved once instead of per template read; an unknown charset still
+        # raises LookupError on first load, as with open(encoding=...).
+        return codecs.getdecoder(self.file_charset)
+
     def get_template_builtins(self, builtins):
         return [import_library(x) for x in builtins]
 
@@ -3,3 +3,9 @@
 cdef bint _float_is_str_fast(lang)
 cpdef localize(value, use_l10n=*, lang=*)
 cpdef number_format(value, decimal_pos=*, use_l10n=*, force_grouping=*, lang=*)
+
+# Types localize() dispatches on, as C globals (see formats.py).
+cdef object _Decimal, _datetime, _date, _time
+
+# Bound get_language(), as a C global (see formats.py).
+cdef object _get_language
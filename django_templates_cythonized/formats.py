@@ -8,6 +8,7 @@ Key optimizations over Django's implementation:
 - Single get_language() call per number_format (Django calls it up to 4x)
 - Per-language cached format values (DECIMAL_SEPARATOR, NUMBER_GROUPING, THOUSAND_SEPARATOR)
 - C-level number formatting (_format_number cfunc)
+- Digit grouping for machine-size ints written straight into a C buffer
 - Early exit for ints when USE_THOUSAND_SEPARATOR is False (the default)
 """
 
@@ -15,8 +16,11 @@ import datetime
 import decimal
 
 import cython
+from cython.cimports.cpython.unicode import PyUnicode_4BYTE_KIND, PyUnicode_FromKindAndData
 from django.conf import settings
-from django.utils.formats import date_format, get_format, time_format
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.formats import FORMAT_SETTINGS, date_format, get_format, time_format
 from django.utils.translation import get_language
 
 __all__ = ["localize", "number_format"]
@@ -24,8 +28,31 @@ __all__ = ["localize", "number_format"]
 # Cached settings flag: None = not yet checked, True/False = cached value.
 _use_thousand_sep: object = None
 
-# Per-language cached format values: lang → (decimal_sep, number_grouping, thousand_sep)
+# Per-language cached format values:
+# lang → (decimal_sep, number_grouping, thousand_sep, number_grouping != 0).
+# Bounded so a stream of unexpected language codes can't grow it forever;
+# the oldest entry is dropped first.
 _number_format_cache: dict = {}
+_NUMBER_FORMAT_CACHE_SIZE = cython.declare(cython.Py_ssize_t, 64)
+
+# C-global binding for the per-call language lookup (see formats.pxd).
+_get_language = get_language
+
+# Types localize() dispatches on; declared as C globals in formats.pxd so each
+# check is a pointer compare rather than a module-global lookup.
+_Decimal = decimal.Decimal
+_datetime = datetime.datetime
+_date = datetime.date
+_time = datetime.time
+
+
+@receiver(setting_changed, dispatch_uid="dtc_number_formats")
+def _reset_number_formats(sender, setting, **kwargs):
+    global _use_thousand_sep
+    if setting == "USE_THOUSAND_SEPARATOR":
+        _use_thousand_sep = None
+    if setting in FORMAT_SETTINGS or setting == "USE_THOUSAND_SEPARATOR" or setting == "FORMAT_MODULE_PATH":
+        _number_format_cache.clear()
 
 
 @cython.cfunc
@@ -52,19 +79,49 @@ def _float_is_str_fast(lang) -> cython.bint:
 
 
 @cython.cfunc
-def _get_number_formats(lang):
-    """Get cached (decimal_sep, grouping, thousand_sep) for the given language."""
+def _get_number_formats(lang) -> tuple:
+    """Get cached (decimal_sep, grouping, thousand_sep, groups) for the given language."""
     cached = _number_format_cache.get(lang)
     if cached is not None:
         return cached
     decimal_sep = get_format("DECIMAL_SEPARATOR", lang, use_l10n=True)
     grouping = get_format("NUMBER_GROUPING", lang, use_l10n=True)
     thousand_sep = get_format("THOUSAND_SEPARATOR", lang, use_l10n=True)
-    result = (decimal_sep, grouping, thousand_sep)
+    result = (decimal_sep, grouping, thousand_sep, grouping != 0)
+    if len(_number_format_cache) >= _NUMBER_FORMAT_CACHE_SIZE:
+        del _number_format_cache[next(iter(_number_format_cache))]
     _number_format_cache[lang] = result
     return result
 
 
+@cython.cfunc
+def _format_int_grouped(n: cython.longlong, sep: cython.Py_UCS4, group: cython.int) -> str:
+    """Format n with sep inserted every `group` digits, counting from the right."""
+    # 20 digits, up to 19 separators (group == 1) and a sign.
+    buf: cython.Py_UCS4[48]
+    pos: cython.int = 48
+    cnt: cython.int = 0
+    # Negate in unsigned arithmetic so LLONG_MIN doesn't overflow.
+    mag: cython.ulonglong = cython.cast(cython.ulonglong, n)
+    if n < 0:
+        mag = 0 - mag
+    while True:
+        if cnt == group:
+            pos -= 1
+            buf[pos] = sep
+            cnt = 0
+        pos -= 1
+        buf[pos] = 48 + cython.cast(cython.int, mag % 10)
+        mag = mag // 10
+        cnt += 1
+        if mag == 0:
+            break
+    if n < 0:
+        pos -= 1
+        buf[pos] = 45  # "-"
+    return PyUnicode_FromKindAndData(PyUnicode_4BYTE_KIND, cython.address(buf[pos]), 48 - pos)
+
+
 @cython.cfunc
 def _format_number(number, decimal_sep, decimal_pos, grouping, thousand_sep, use_grouping):
     """
@@ -80,6 +137,25 @@ def _format_number(number, decimal_sep, decimal_pos, grouping, thousand_sep, use
     if isinstance(number, int) and not use_grouping and not decimal_pos:
         return str(number)
 
+    # Grouped plain ints with a uniform interval and a one-character
+    # separator (every stock locale) skip the string slicing below.
+    n_ll: cython.longlong
+    if (
+        use_grouping
+        and not decimal_pos
+        and type(number) is int
+        and type(grouping) is int
+        and grouping > 0
+        and type(thousand_sep) is str
+        and len(thousand_sep) == 1
+    ):
+        try:
+            n_ll = number
+        except OverflowError:
+            pass
+        else:
+            return _format_int_grouped(n_ll, thousand_sep, min(grouping, 32))
+
     sign: str = ""
 
     # Treat potentially very large/small floats as Decimals.
@@ -136,18 +212,24 @@ def _format_number(number, decimal_sep, decimal_pos, grouping, thousand_sep, use
             intervals = list(grouping)
         except TypeError:
             intervals = [grouping, 0]
-        active_interval = intervals.pop(0)
-        int_part_gd: str = ""
-        cnt: cython.int = 0
-        for digit in int_part[::-1]:
-            if cnt and cnt == active_interval:
-                if intervals:
-                    active_interval = intervals.pop(0) or active_interval
-                int_part_gd += thousand_sep[::-1]
-                cnt = 0
-            int_part_gd += digit
-            cnt += 1
-        int_part = int_part_gd[::-1]
+        # Slice whole groups off the right end and join once, rather than
+        # building the reversed string a digit at a time. A zero interval
+        # repeats the previous one; a non-positive first one never groups.
+        active_interval = intervals[0]
+        n_intervals: cython.Py_ssize_t = len(intervals)
+        next_interval: cython.Py_ssize_t = 1
+        end: cython.Py_ssize_t = len(int_part)
+        groups: list = []
+        while active_interval > 0 and end > active_interval:
+            groups.append(int_part[end - active_interval : end])
+            end -= active_interval
+            if next_interval < n_intervals:
+                active_interval = intervals[next_interval] or active_interval
+                next_interval += 1
+        if groups:
+            groups.append(int_part[:end])
+            groups.reverse()
+            int_part = thousand_sep.join(groups)
 
     return sign + int_part + dec_part
 
@@ -174,12 +256,12 @@ def number_format(value, decimal_pos=None, use_l10n=None, force_grouping=False,
 
     # Use pre-cached language if available, otherwise call get_language().
     if lang is None:
-        lang = get_language() if use_l10n else None
-    formats = _get_number_formats(lang)
+        lang = _get_language() if use_l10n else None
+    formats: tuple = _get_number_formats(lang)
 
-    use_grouping: cython.bint = bool(use_l10n) and _get_use_thousand_sep()
-    use_grouping = use_grouping or bool(force_grouping)
-    use_grouping = use_grouping and formats[1] != 0
+    use_grouping: cython.bint = False
+    if formats[3]:
+        use_grouping = bool(force_grouping) or (bool(use_l10n) and _get_use_thousand_sep())
 
     return _format_number(
         value,
@@ -199,11 +281,14 @@ def localize(value, use_l10n=None, lang=None):
     get_language() calls when cached on the Context.
     """
     global _use_thousand_sep
-    if isinstance(value, str):
+    # Exact-type checks first; isinstance() below only runs for subclasses.
+    tp = type(value)
+    if tp is str:
         return value
-    # int check first (catches bool subclass too) — the most common numeric type.
-    # Single isinstance(int) is faster than isinstance((Decimal, float, int)) tuple.
-    if isinstance(value, int):
+    if tp is bool:
+        return str(value)
+    # int before the other numbers — the most common numeric type.
+    if tp is int or isinstance(value, int):
         if isinstance(value, bool):
             return str(value)
         if use_l10n is False:
@@ -217,7 +302,7 @@ def localize(value, use_l10n=None, lang=None):
         if not uts:
             return str(value)
         return number_format(value, use_l10n=use_l10n, lang=lang)
-    if isinstance(value, float):
+    if tp is float or isinstance(value, float):
         if use_l10n is False:
             return str(value)
         # Float fast path: when USE_THOUSAND_SEPARATOR is False (default) and
@@ -227,19 +312,21 @@ def localize(value, use_l10n=None, lang=None):
             uts = bool(settings.USE_THOUSAND_SEPARATOR)
             _use_thousand_sep = uts
         if not uts:
-            _lang = lang if lang is not None else get_language()
+            _lang = lang if lang is not None else _get_language()
             fmt = _get_number_formats(_lang)
             if fmt[0] == ".":
                 return str(value)
         return number_format(value, use_l10n=use_l10n, lang=lang)
-    if isinstance(value, decimal.Decimal):
+    if isinstance(value, str):
+        return value
+    if tp is _Decimal or isinstance(value, _Decimal):
         if use_l10n is False:
             return str(value)
         return number_format(value, use_l10n=use_l10n, lang=lang)
-    if isinstance(value, datetime.datetime):
+    if tp is _datetime or isinstance(value, _datetime):
         return date_format(value, "DATETIME_FORMAT", use_l10n=use_l10n)
-    if isinstance(value, datetime.date):
+    if tp is _date or isinstance(value, _date):
         return date_format(value, use_l10n=use_l10n)
-    if isinstance(value, datetime.time):
+    if tp is _time or isinstance(value, _time):
         return time_format(value, use_l10n=use_l10n)
     return value
@@ -1,5 +1,7 @@
 # C-level declarations for cross-module access to escape/conditional_escape.
 
+cdef bint _needs_escape(str s)
+cdef str _escape_str(str s)
 cdef _fast_escape_str(str s)
 cpdef escape(text)
 cpdef conditional_escape(text)
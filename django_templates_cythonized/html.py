@@ -8,6 +8,9 @@ scanning that skips html.escape() entirely when no special chars are present.
 import html as _html
 
 import cython
+from cython.cimports.cpython.unicode import PyUnicode_1BYTE_DATA, PyUnicode_GET_LENGTH, PyUnicode_KIND, PyUnicode_New
+from cython.cimports.libc.stdint import uint64_t
+from cython.cimports.libc.string import memcpy
 from django.utils.functional import Promise
 from django.utils.safestring import SafeData, SafeString
 
@@ -20,7 +23,115 @@ def escape(text):
     Return the given text with ampersands, quotes and angle brackets encoded
     for use in HTML. Always escape input, even if already marked safe.
     """
-    return SafeString(_html.escape(str(text)))
+    # str() always returns a str instance (SafeString returns itself).
+    return SafeString(_escape_str(cython.cast(str, str(text))))
+
+
+@cython.cfunc
+def _needs_escape(s: str) -> cython.bint:
+    """
+    Return True if s contains any of <, >, &, ", '.
+
+    Latin-1 strings (the common case) are scanned eight bytes at a time: a
+    byte equal to c becomes zero in w ^ broadcast(c), and the usual
+    "has zero byte" bit trick detects that for all five specials per word.
+    Wider kinds fall back to a per-codepoint loop.
+    """
+    c: cython.Py_UCS4
+    if PyUnicode_KIND(s) != 1:
+        for c in s:
+            if c == 60 or c == 62 or c == 38 or c == 34 or c == 39:
+                return True
+        return False
+
+    data: cython.p_uchar = cython.cast(cython.p_uchar, PyUnicode_1BYTE_DATA(s))
+    n: cython.Py_ssize_t = PyUnicode_GET_LENGTH(s)
+    i: cython.Py_ssize_t = 0
+    ones: uint64_t = 0x0101010101010101
+    highs: uint64_t = 0x8080808080808080
+    w: uint64_t
+    x: uint64_t
+    hits: uint64_t
+    while i + 8 <= n:
+        memcpy(cython.address(w), data + i, 8)
+        x = w ^ (ones * 60)
+        hits = (x - ones) & ~x
+        x = w ^ (ones * 62)
+        hits |= (x - ones) & ~x
+        x = w ^ (ones * 38)
+        hits |= (x - ones) & ~x
+        x = w ^ (ones * 34)
+        hits |= (x - ones) & ~x
+        x = w ^ (ones * 39)
+        hits |= (x - ones) & ~x
+        if hits & highs:
+            return True
+        i += 8
+    b: cython.uchar
+    while i < n:
+        b = data[i]
+        if b == 60 or b == 62 or b == 38 or b == 34 or b == 39:
+            return True
+        i += 1
+    return False
+
+
+@cython.cfunc
+def _escape_str(s: str) -> str:
+    """
+    Equivalent of html.escape(s) in a single pass.
+
+    For Latin-1 strings, one loop sizes the result and a second writes it
+    into a single preallocated string, instead of html.escape's chain of
+    five str.replace calls. Wider kinds are left to html.escape.
+    """
+    if PyUnicode_KIND(s) != 1:
+        return _html.escape(s)
+
+    src: cython.p_uchar = cython.cast(cython.p_uchar, PyUnicode_1BYTE_DATA(s))
+    n: cython.Py_ssize_t = PyUnicode_GET_LENGTH(s)
+    out_len: cython.Py_ssize_t = n
+    high: cython.uchar = 0
+    b: cython.uchar
+    i: cython.Py_ssize_t
+    for i in range(n):
+        b = src[i]
+        high |= b
+        if b == 38:  # &amp;
+            out_len += 4
+        elif b == 60 or b == 62:  # &lt; &gt;
+            out_len += 3
+        elif b == 34 or b == 39:  # &quot; &#x27;
+            out_len += 5
+    if out_len == n:
+        return s
+
+    # The result must be ASCII-kind when the input is, or it won't compare
+    # equal to strings built the normal way.
+    out: str = PyUnicode_New(out_len, 255 if high & 0x80 else 127)
+    dst: cython.p_uchar = cython.cast(cython.p_uchar, PyUnicode_1BYTE_DATA(out))
+    j: cython.Py_ssize_t = 0
+    for i in range(n):
+        b = src[i]
+        if b == 38:
+            memcpy(dst + j, b"&amp;", 5)
+            j += 5
+        elif b == 60:
+            memcpy(dst + j, b"&lt;", 4)
+            j += 4
+        elif b == 62:
+            memcpy(dst + j, b"&gt;", 4)
+            j += 4
+        elif b == 34:
+            memcpy(dst + j, b"&quot;", 6)
+            j += 6
+        elif b == 39:
+            memcpy(dst + j, b"&#x27;", 6)
+            j += 6
+        else:
+            dst[j] = b
+            j += 1
+    return out
 
 
 @cython.cfunc
@@ -28,12 +139,10 @@ def _fast_escape_str(s: str):
     """
     C-level HTML escape: scan string chars for <, >, &, ", '.
     If none found, return the original string unchanged (zero allocation).
-    Only calls html.escape when actually needed.
+    Only builds an escaped copy when actually needed.
     """
-    c: cython.Py_UCS4
-    for c in s:
-        if c == 60 or c == 62 or c == 38 or c == 34 or c == 39:
-            return _html.escape(s)
+    if _needs_escape(s):
+        return _escape_str(s)
     return s
 
 
@@ -46,6 +155,10 @@ def conditional_escape(text):
     the string contains no HTML-special characters (the common case for
     template variables like names, numbers, etc.).
     """
+    # Plain str (the usual template value) can't be lazy, safe or have
+    # __html__, so skip those checks.
+    if type(text) is str:
+        return SafeString(_fast_escape_str(text))
     # Resolve lazy strings (e.g. lazy(mark_safe, str)) before checking SafeData,
     # so that lazy-wrapped SafeString values are preserved correctly.
     if isinstance(text, Promise):
@@ -20,10 +20,16 @@ class Loader(BaseLoader):
 
     def get_contents(self, origin):
         try:
-            with open(origin.name, encoding=self.engine.file_charset) as fp:
-                return fp.read()
+            with open(origin.name, "rb") as fp:
+                raw = fp.read()
         except FileNotFoundError:
             raise TemplateDoesNotExist(origin)
+        contents = self.engine._file_decoder(raw)[0]
+        # Binary reads skip the TextIOWrapper, so apply its universal-newline
+        # translation here.
+        if "\r" in contents:
+            contents = contents.replace("\r\n", "\n").replace("\r", "\n")
+        return contents
 
     def get_template_sources(self, template_name):
         """
@@ -2,6 +2,8 @@ from django.http import HttpResponse
 
 from django.template.loader import get_template, select_template
 
+from .backend import _Template
+
 
 class ContentNotRenderedError(Exception):
     pass
@@ -87,6 +89,8 @@ class SimpleTemplateResponse(HttpResponse):
         """
         template = self.resolve_template(self.template_name)
         context = self.resolve_context(self.context_data)
+        if type(template) is _Template:
+            return template(context, self._request)
         return template.render(context, self._request)
 
     def add_post_render_callback(self, callback):
@@ -14,6 +14,8 @@ __all__ = ["SafeData", "SafeString", "mark_safe"]
 @cython.ccall
 def mark_safe(s):
     """Mark a string as safe for HTML output."""
+    if type(s) is str:
+        return SafeString(s)
     if isinstance(s, SafeData):
         return s
     if isinstance(s, str):
@@ -3,6 +3,23 @@
 
 from django_templates_cythonized.context cimport Context
 
+# Op codes as compile-time constants, mirroring the Python OP_* names in
+# smartif.py, so Operator.eval's if/elif chain compiles to a C switch.
+cdef enum:
+    _OP_OR = 0
+    _OP_AND = 1
+    _OP_NOT = 2
+    _OP_IN = 3
+    _OP_NOT_IN = 4
+    _OP_IS = 5
+    _OP_IS_NOT = 6
+    _OP_EQ = 7
+    _OP_NE = 8
+    _OP_GT = 9
+    _OP_GE = 10
+    _OP_LT = 11
+    _OP_LE = 12
+
 cdef class TokenBase:
     cdef public object id
     cdef public int lbp
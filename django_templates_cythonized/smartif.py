@@ -26,6 +26,22 @@ OP_GE: cython.int = 10
 OP_LT: cython.int = 11
 OP_LE: cython.int = 12
 
+# The compiled module takes _OP_* from the C enum in smartif.pxd.
+if not cython.compiled:
+    _OP_OR = OP_OR
+    _OP_AND = OP_AND
+    _OP_NOT = OP_NOT
+    _OP_IN = OP_IN
+    _OP_NOT_IN = OP_NOT_IN
+    _OP_IS = OP_IS
+    _OP_IS_NOT = OP_IS_NOT
+    _OP_EQ = OP_EQ
+    _OP_NE = OP_NE
+    _OP_GT = OP_GT
+    _OP_GE = OP_GE
+    _OP_LT = OP_LT
+    _OP_LE = OP_LE
+
 
 # TokenBase, Operator, Literal, EndToken are declared as cdef classes
 # in smartif.pxd. Do NOT use @cython.cclass or cython.declare() here.
@@ -101,33 +117,33 @@ class Operator(TokenBase):
     def eval(self, context: Context):
         op: cython.int = self.op_code
         try:
-            if op == OP_OR:
+            if op == _OP_OR:
                 left = self.first.eval(context)
                 return left if left else self.second.eval(context)
-            elif op == OP_AND:
+            elif op == _OP_AND:
                 left = self.first.eval(context)
                 return self.second.eval(context) if left else left
-            elif op == OP_NOT:
+            elif op == _OP_NOT:
                 return not self.first.eval(context)
-            elif op == OP_IN:
+            elif op == _OP_IN:
                 return self.first.eval(context) in self.second.eval(context)
-            elif op == OP_NOT_IN:
+            elif op == _OP_NOT_IN:
                 return self.first.eval(context) not in self.second.eval(context)
-            elif op == OP_IS:
+            elif op == _OP_IS:
                 return self.first.eval(context) is self.second.eval(context)
-            elif op == OP_IS_NOT:
+            elif op == _OP_IS_NOT:
                 return self.first.eval(context) is not self.second.eval(context)
-            elif op == OP_EQ:
+            elif op == _OP_EQ:
                 return self.first.eval(context) == self.second.eval(context)
-            elif op == OP_NE:
+            elif op == _OP_NE:
                 return self.first.eval(context) != self.second.eval(context)
-            elif op == OP_GT:
+            elif op == _OP_GT:
                 return self.first.eval(context) > self.second.eval(context)
-            elif op == OP_GE:
+            elif op == _OP_GE:
                 return self.first.eval(context) >= self.second.eval(context)
-            elif op == OP_LT:
+            elif op == _OP_LT:
                 return self.first.eval(context) < self.second.eval(context)
-            elif op == OP_LE:
+            elif op == _OP_LE:
                 return self.first.eval(context) <= self.second.eval(context)
         except Exception:
             return False
@@ -179,21 +195,22 @@ class EndToken(TokenBase):
 _end_token = EndToken()
 
 
-# Operator precedence follows Python.
+# Operator precedence follows Python. Each entry holds the Operator
+# constructor arguments: (op_code, lbp, id, is_prefix).
 OPERATORS = {
-    "or": lambda: Operator(OP_OR, 6, "or"),
-    "and": lambda: Operator(OP_AND, 7, "and"),
-    "not": lambda: Operator(OP_NOT, 8, "not", is_prefix=True),
-    "in": lambda: Operator(OP_IN, 9, "in"),
-    "not in": lambda: Operator(OP_NOT_IN, 9, "not in"),
-    "is": lambda: Operator(OP_IS, 10, "is"),
-    "is not": lambda: Operator(OP_IS_NOT, 10, "is not"),
-    "==": lambda: Operator(OP_EQ, 10, "=="),
-    "!=": lambda: Operator(OP_NE, 10, "!="),
-    ">": lambda: Operator(OP_GT, 10, ">"),
-    ">=": lambda: Operator(OP_GE, 10, ">="),
-    "<": lambda: Operator(OP_LT, 10, "<"),
-    "<=": lambda: Operator(OP_LE, 10, "<="),
+    "or": (OP_OR, 6, "or", False),
+    "and": (OP_AND, 7, "and", False),
+    "not": (OP_NOT, 8, "not", True),
+    "in": (OP_IN, 9, "in", False),
+    "not in": (OP_NOT_IN, 9, "not in", False),
+    "is": (OP_IS, 10, "is", False),
+    "is not": (OP_IS_NOT, 10, "is not", False),
+    "==": (OP_EQ, 10, "==", False),
+    "!=": (OP_NE, 10, "!=", False),
+    ">": (OP_GT, 10, ">", False),
+    ">=": (OP_GE, 10, ">=", False),
+    "<": (OP_LT, 10, "<", False),
+    "<=": (OP_LE, 10, "<=", False),
 }
 
 
@@ -202,9 +219,10 @@ class IfParser:
 
     def __init__(self, tokens):
         # Turn 'is','not' and 'not','in' into single tokens.
-        num_tokens = len(tokens)
+        num_tokens: cython.Py_ssize_t = len(tokens)
         mapped_tokens = []
-        i = 0
+        translate_token = self.translate_token
+        i: cython.Py_ssize_t = 0
         while i < num_tokens:
             token = tokens[i]
             if token == "is" and i + 1 < num_tokens and tokens[i + 1] == "not":
@@ -213,7 +231,7 @@ class IfParser:
             elif token == "not" and i + 1 < num_tokens and tokens[i + 1] == "in":
                 token = "not in"
                 i += 1  # skip 'in'
-            mapped_tokens.append(self.translate_token(token))
+            mapped_tokens.append(translate_token(token))
             i += 1
 
         self.tokens = mapped_tokens
@@ -222,11 +240,12 @@ class IfParser:
 
     def translate_token(self, token):
         try:
-            op = OPERATORS[token]
-        except (KeyError, TypeError):
+            args = OPERATORS.get(token)
+        except TypeError:
+            args = None
+        if args is None:
             return self.create_var(token)
-        else:
-            return op()
+        return Operator(*args)
 
     def next_token(self):
         if self.pos >= len(self.tokens):
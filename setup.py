@@ -1,17 +1,39 @@
+import os
+from pathlib import Path
+
 from Cython.Build import cythonize
 from setuptools import setup
 
-setup(
-    ext_modules=cythonize(
-        "django_templates_cythonized/*.py",
-        exclude=["django_templates_cythonized/__init__.py"],
-        compiler_directives={
-            "language_level": "3",
-            "boundscheck": False,
-            "wraparound": True,
-            "cdivision": True,
-            "infer_types": True,
-            "profile": False,
-        },
-    ),
+ext_modules = cythonize(
+    "django_templates_cythonized/*.py",
+    exclude=["django_templates_cythonized/__init__.py"],
+    compiler_directives={
+        "language_level": "3",
+        "boundscheck": False,
+        "wraparound": True,
+        "cdivision": True,
+        "infer_types": True,
+        "profile": False,
+        "linetrace": False,
+        "nonecheck": False,
+    },
 )
+
+# Profile-guided optimization (GCC): build with DTC_PGO=generate, run a
+# representative workload, then rebuild with DTC_PGO=use. Profiles are
+# written to DTC_PGO_DIR (default: build/pgo).
+pgo = os.environ.get("DTC_PGO", "")
+if pgo:
+    if pgo not in ("generate", "use"):
+        msg = f"DTC_PGO must be 'generate' or 'use', not {pgo!r}"
+        raise ValueError(msg)
+    profile_dir = Path(os.environ.get("DTC_PGO_DIR", "build/pgo")).resolve()
+    if pgo == "generate":
+        flags = [f"-fprofile-generate={profile_dir}"]
+    else:
+        flags = [f"-fprofile-use={profile_dir}", "-fprofile-correction", "-Wno-missing-profile"]
+    for ext in ext_modules:
+        ext.extra_compile_args += flags
+        ext.extra_link_args += flags
+
+setup(ext_modules=ext_modules)
@@ -27,6 +27,13 @@ def current_user_greeting(context):
     return f"Welcome back, {user}"
 
 
+@register.simple_tag(takes_context=True)
+def capture_context(context, sink):
+    """Simple tag that keeps a copy of the context past the render."""
+    sink.append(context.__copy__())
+    return ""
+
+
 @register.simple_tag
 def format_price(amount, currency="$"):
     """Simple tag with a keyword argument."""
@@ -122,6 +122,39 @@ class TestVariableResolution:
     def test_list_index(self, stock, cyth):
         _m(stock, cyth, "{{ items.0 }}", {"items": ["first", "second", "third"]})
 
+    def test_localized_value_types(self, stock, cyth):
+        """Exact types and subclasses of each localized type render alike."""
+        import decimal
+        import enum
+
+        class Level(enum.IntEnum):
+            HIGH = 3
+
+        class MyDate(datetime.date):
+            pass
+
+        class MyFloat(float):
+            pass
+
+        values = [
+            "s",
+            SafeString("<b>"),
+            7,
+            True,
+            Level.HIGH,
+            1.5,
+            MyFloat(2.25),
+            decimal.Decimal("3.10"),
+            datetime.datetime(2024, 1, 15, 14, 30),
+            datetime.date(2024, 6, 15),
+            MyDate(2024, 6, 16),
+            datetime.time(14, 30),
+            None,
+        ]
+        _m(stock, cyth, "{% for v in values %}{{ v }}|{% endfor %}", {"values": values})
+        for v in values:
+            _m(stock, cyth, "{{ v }}", {"v": v})
+
     def test_list_index_last(self, stock, cyth):
         _m(stock, cyth, "{{ items.2 }}", {"items": ["a", "b", "c"]})
 
@@ -254,6 +287,24 @@ class TestIfTag:
             {"a": False, "b": False, "c": True},
         )
 
+    def test_if_missing_filter_argument(self, stock, cyth):
+        """A missing filter argument raises VariableDoesNotExist inside eval."""
+        for tpl in (
+            "{% if a|add:missing %}Y{% else %}N{% endif %}",
+            "{% if a|add:missing and a %}Y{% else %}N{% endif %}",
+            "{% if not a|add:missing %}Y{% elif a|add:missing %}E{% else %}N{% endif %}",
+        ):
+            _m(stock, cyth, tpl, {"a": 1})
+
+    def test_repeated_conditions(self, stock, cyth):
+        """Identical conditions across tags render independently."""
+        tpl = (
+            "{% if a.b|length > 1 %}1{% endif %}"
+            "{% for a in items %}{% if a.b|length > 1 %}2{% elif a %}3{% endif %}{% endfor %}"
+            "{% if a.b|length > 1 %}4{% elif a.b|length > 1 %}5{% endif %}"
+        )
+        _m(stock, cyth, tpl, {"a": {"b": [1, 2]}, "items": [{"b": [1]}, {"b": [1, 2, 3]}]})
+
     def test_if_multiple_elif(self, stock, cyth):
         _m(
             stock,
@@ -431,6 +482,31 @@ class TestForTag:
             {"items": [("a", 1), ("b", 2), ("c", 3)]},
         )
 
+    def test_pair_unpacking_mixed_items(self, stock, cyth):
+        """Two loop variables over tuples, lists, strings and dict items."""
+        tpl = "{% for k, v in items %}{{ k }}={{ v }};{% endfor %}"
+        _m(stock, cyth, tpl, {"items": [("a", 1), ["b", 2], "cd", ("e", None)]})
+        _m(stock, cyth, tpl, {"items": {"x": 1, "y": 2}.items()})
+        _m(stock, cyth, "{% for k, k in items %}{{ k }};{% endfor %}", {"items": [(1, 2), (3, 4)]})
+        for engine in (stock, cyth):
+            with pytest.raises(ValueError):
+                engine.from_string(tpl).render({"items": [("a", 1), ("b", 2, 3)]})
+
+    def test_invalid_loopvars(self, stock, cyth):
+        from django.template import TemplateSyntaxError as DjangoTemplateSyntaxError
+
+        for tpl in (
+            "{% for a|b in x %}{% endfor %}",
+            "{% for 'a' in x %}{% endfor %}",
+            '{% for a, "b" in x %}{% endfor %}',
+            "{% for a,,b in x %}{% endfor %}",
+            "{% for a, in x %}{% endfor %}",
+        ):
+            for engine in (stock, cyth):
+                with pytest.raises(DjangoTemplateSyntaxError, match="invalid argument"):
+                    engine.from_string(tpl)
+        _m(stock, cyth, "{% for a ,b in x %}{{ a }}{{ b }}{% endfor %}", {"x": [(1, 2)]})
+
     def test_tuple_unpacking_3(self, stock, cyth):
         """3-variable unpacking."""
         _m(
@@ -559,6 +635,15 @@ class TestCycleTag:
             {"items": range(4)},
         )
 
+    def test_special_characters(self, stock, cyth):
+        for tpl in (
+            "{% for x in items %}{% cycle '<b>' 'a&b' '\"q\"' 'plain' %}{% endfor %}",
+            "{% autoescape off %}{% for x in items %}{% cycle '<b>' 'x' %}{% endfor %}{% endautoescape %}",
+            "{% for x in items %}{% cycle '<b>' 'a&b' as c %}[{{ c }}]{% endfor %}",
+            "{% autoescape off %}{% for x in items %}{% cycle '<b>' 'a&b' as c %}[{{ c }}]{% endfor %}{% endautoescape %}",
+        ):
+            _m(stock, cyth, tpl, {"items": range(5)})
+
 
 # ===========================================================================
 # 5. WITH TAG
@@ -648,6 +733,18 @@ class TestFirstofTag:
     def test_autoescape(self, stock, cyth):
         _m(stock, cyth, "{% firstof val %}", {"val": "<b>bold</b>"})
 
+    def test_leading_literals(self, stock, cyth):
+        for tpl in (
+            '{% firstof "" 0 a "x" %}',
+            '{% firstof "" "lit" a %}',
+            "{% firstof 1.5 a %}",
+            '{% firstof "" "<b>"|upper a %}',
+            '{% firstof "" 0 as v %}[{{ v }}]',
+            '{% firstof "lit" as v %}[{{ v }}]',
+        ):
+            _m(stock, cyth, tpl, {"a": "A"})
+            _m(stock, cyth, tpl, {})
+
 
 # ===========================================================================
 # 9. VERBATIM TAG
@@ -711,6 +808,11 @@ class TestNowTag:
     def test_as_variable(self, stock, cyth):
         _m(stock, cyth, '{% now "Y" as year %}The year is {{ year }}.', {})
 
+    def test_follows_use_tz_overrides(self, stock, cyth):
+        for use_tz in (False, True, False):
+            with override_settings(USE_TZ=use_tz, TIME_ZONE="America/Chicago"):
+                _m(stock, cyth, '{% now "e|Y" %}', {})
+
 
 # ===========================================================================
 # 12. WIDTHRATIO TAG
@@ -732,6 +834,28 @@ class TestWidthratioTag:
     def test_as_variable(self, stock, cyth):
         _m(stock, cyth, "{% widthratio this_val max_val 100 as ratio %}[{{ ratio }}]", {"this_val": 50, "max_val": 100})
 
+    def test_numeric_edge_values(self, stock, cyth):
+        tpl = "{% widthratio v m w %}"
+        cases = [
+            (1, 8, 20),  # 2.5 rounds half to even
+            (3, 8, 20),  # 7.5
+            (-1, 8, 20),
+            (1, 3, 100),
+            (0.5, 0, 100),
+            (0.5, -0.0, 100),
+            (float("nan"), 1, 100),
+            (float("inf"), 1, 100),
+            (1e308, 1e-308, 100),
+            (1e300, 1, 10**6),
+            (10**400, 1, 100),
+            (5, 10**400, 100),
+            (True, 2, 100),
+            ("3.5", 7, 100),
+            (None, 1, 100),
+        ]
+        for v, m, w in cases:
+            _m(stock, cyth, tpl, {"v": v, "m": m, "w": w})
+
 
 # ===========================================================================
 # 13. FILTER TAG
@@ -774,6 +898,32 @@ class TestIfchangedTag:
             {"items": [1, 1, 2, 2, 3]},
         )
 
+    def test_single_parameter_edge_values(self, stock, cyth):
+        """None first, NaN, equal-but-not-identical and nested loops."""
+        nan = float("nan")
+        items = [None, None, nan, nan, float("nan"), [1], [1], 0, False, "0", "0"]
+        _m(
+            stock,
+            cyth,
+            "{% for x in items %}{% ifchanged x %}[{{ x }}]{% else %}.{% endifchanged %}{% endfor %}",
+            {"items": items},
+        )
+        _m(
+            stock,
+            cyth,
+            "{% for g in groups %}{% for x in g %}{% ifchanged x %}{{ x }}{% endifchanged %}{% endfor %}|{% endfor %}",
+            {"groups": [[1, 1, 2], [2, 2], [None]]},
+        )
+        _m(stock, cyth, "{% ifchanged x %}A{% endifchanged %}{% ifchanged x %}B{% endifchanged %}", {"x": None})
+
+    def test_multiple_parameters(self, stock, cyth):
+        _m(
+            stock,
+            cyth,
+            "{% for a, b in items %}{% ifchanged a b %}[{{ a }}{{ b }}]{% endifchanged %}{% endfor %}",
+            {"items": [(1, 1), (1, 1), (1, 2), (None, None), (None, None)]},
+        )
+
     def test_parameter(self, stock, cyth):
         _m(
             stock,
@@ -896,6 +1046,50 @@ class TestAutoescapeAndSafety:
         """All 5 HTML special characters should be escaped."""
         _m(stock, cyth, "{{ val }}", {"val": "<>&\"'"})
 
+    @pytest.mark.parametrize("pad", [0, 1, 7, 8, 9, 15, 16, 23])
+    @pytest.mark.parametrize("special", ["<", ">", "&", '"', "'"])
+    def test_special_at_word_offsets(self, stock, cyth, pad, special):
+        """Specials are found at any offset, including in the unaligned tail."""
+        _m(
+            stock,
+            cyth,
+            "{{ val }}|{{ items.0 }}",
+            {"val": "a" * pad + special + "b" * pad, "items": ["x" * pad + special]},
+        )
+
+    @pytest.mark.parametrize(
+        "val",
+        [
+            "plain ascii text only",
+            "café crème brûlée déjà vu",
+            "ÿ\x80\x7f;=?%$#!",
+            "日本語<b>テキスト</b>",
+            "emoji 🎉 & more",
+        ],
+    )
+    def test_non_ascii_text(self, stock, cyth, val):
+        _m(stock, cyth, "{{ val }}", {"val": val})
+        _m(stock, cyth, "{{ val|force_escape }}|{{ val|safe|force_escape }}", {"val": val + "<'\"&>"})
+
+    def test_escape_input_kinds(self, stock, cyth):
+        """Non-plain-str values still go through the lazy / safe / __html__ checks."""
+
+        class Html:
+            def __html__(self):
+                return "<i>html</i>"
+
+            def __str__(self):
+                return "<i>str</i>"
+
+        class Sub(str):
+            __slots__ = ()
+
+        lazy_str = lazy(lambda: "<b>lazy</b>", str)
+        lazy_safe = lazy(lambda: mark_safe("<b>lazy safe</b>"), str)
+        ctx = {"h": Html(), "sub": Sub("<u>sub</u>"), "ls": lazy_str(), "lss": lazy_safe(), "n": 5}
+        _m(stock, cyth, "{{ h }}|{{ sub }}|{{ ls }}|{{ lss }}|{{ n }}", ctx)
+        _m(stock, cyth, "{{ h|escape }}|{{ sub|escape }}|{{ h|safe }}|{{ sub|safe }}", ctx)
+
     def test_filter_in_autoescape_off(self, stock, cyth):
         _m(stock, cyth, "{% autoescape off %}{{ val|upper }}{% endautoescape %}", {"val": "<b>test</b>"})
 
@@ -967,6 +1161,17 @@ class TestIncludeTag:
         """Include a template that itself uses variables from context."""
         _m(stock, cyth, '{% include "include_simple.html" %}', {"item_name": "Widget", "item_value": "42"})
 
+    def test_recursive_include_reenters_loop(self, stock, cyth):
+        """The same ForNode rendered inside itself keeps separate loop scopes."""
+        tree = {
+            "children": [
+                {"name": "a", "children": [{"name": "a1", "children": []}, {"name": "a2", "children": []}]},
+                {"name": "b", "children": [{"name": "b1", "children": []}]},
+            ]
+        }
+        for _ in range(2):
+            _m(stock, cyth, '{% include "tree_node.html" with node=tree %}', {"tree": tree})
+
 
 # ===========================================================================
 # 20. BUILT-IN FILTERS — comprehensive coverage
@@ -1524,6 +1729,184 @@ class TestLoopEdgeCases:
             },
         )
 
+    def test_repeated_renders_reuse_loop_analysis(self, stock, cyth):
+        """Cached loop-body analysis must not freeze context-dependent slots."""
+        src = (
+            "{% for item in items %}"
+            "{{ currency }}{{ item.name }}"
+            "{% if flag %}<{{ item.name|upper }}>{% else %}-{% endif %}"
+            "{% cycle 'a' 'b' %}{{ forloop.counter }}"
+            "{% endfor %}"
+        )
+        stpl, ctpl = stock.from_string(src), cyth.from_string(src)
+        for ctx in (
+            {"items": [{"name": "x"}, {"name": "y"}], "currency": "$", "flag": True},
+            {"items": [{"name": "z"}], "currency": "EUR", "flag": False},
+            {"items": [{"name": "w"}, {"name": "v"}, {"name": "u"}], "currency": "", "flag": "yes"},
+        ):
+            assert ctpl.render(ctx) == stpl.render(ctx)
+
+    def test_repeated_renders_named_cycle_before_loop(self, stock, cyth):
+        src = "{% cycle 'a' 'b' as c %}{% for x in items %}{% cycle c %}{% endfor %}"
+        stpl, ctpl = stock.from_string(src), cyth.from_string(src)
+        for n in (1, 3, 2):
+            ctx = {"items": range(n)}
+            assert ctpl.render(ctx) == stpl.render(ctx)
+
+    def test_reversed_non_list_sequences(self, stock, cyth):
+        """Reversed loops over tuples, strings, dicts and ranges in every loop path."""
+        for seq in ((1, 2, 3), "abc", {"a": 1, "b": 2}, range(4), [{"n": 1}, {"n": 2}]):
+            for body in ("{{ x }}", "{{ x.n }}{% if x.n %}y{% endif %}", "{{ x }}{% firstof x as y %}{{ y }}"):
+                _m(stock, cyth, "{% for x in seq reversed %}" + body + ",{% endfor %}", {"seq": seq})
+
+    def test_reversed_set_raises(self, stock, cyth):
+        """reversed() on a set fails the same way in both engines."""
+        tpl = "{% for x in seq reversed %}{{ x }}{% endfor %}"
+        with pytest.raises(TypeError):
+            stock.from_string(tpl).render({"seq": {1, 2}})
+        with pytest.raises(TypeError):
+            cyth.from_string(tpl).render({"seq": {1, 2}})
+        _m(stock, cyth, tpl + "-", {"seq": set()})
+
+    def test_loopif_text_branches(self, stock, cyth):
+        """{% if x.attr %}A{% else %}B{% endif %} with text-only branches."""
+        from types import SimpleNamespace
+
+        class Boom:
+            def __bool__(self):
+                raise ValueError
+
+        items = [
+            {"sold": True},
+            {"sold": 0},
+            {},
+            SimpleNamespace(sold="yes"),
+            SimpleNamespace(),
+            {"sold": lambda: False},
+        ]
+        for tpl in (
+            "{% for r in rows %}[{% if r.sold %}<sold>{% else %}avail{% endif %}]{% endfor %}",
+            "{% for r in rows %}[{% if r.sold %}sold{% endif %}]{% endfor %}",
+            "{% for r in rows %}[{% if r.sold %}s{% else %}{{ r.sold }}{% endif %}]{% endfor %}",
+        ):
+            _m(stock, cyth, tpl, {"rows": items})
+        tpl = "{% for r in rows %}{% if r.sold %}A{% else %}B{% endif %}{% endfor %}"
+        for engine in (stock, cyth):
+            with pytest.raises(ValueError):
+                engine.from_string(tpl).render({"rows": [{"sold": Boom()}]})
+
+    def test_loopif_literal_comparisons(self, stock, cyth):
+        """LOOPIF comparisons against int, str and None literals across value types."""
+        values = [1, 2, 0, -3, True, False, 2.0, 1.75, -0.5, float("nan"), float("inf"), 10**30, "a", mark_safe("a")]
+        values += ["b", None, [], {"k": 1}]
+        rows = [{"v": v} for v in values] + [{}]
+        for cond in (
+            "r.v == 2",
+            "r.v != 2",
+            "r.v > 1",
+            "r.v >= 2",
+            "r.v < 1",
+            "r.v <= 0",
+            "r.v == 100000000000000000000000000000",
+            "r.v == 'a'",
+            "r.v != 'a'",
+            "r.v == None",
+            "r.v != None",
+            "r.v is None",
+            "r.v > 'a'",
+            "r.v is not None",
+            "r.v > 1.5",
+            "r.v == 2.0",
+            "r.v != 2.0",
+            "r.v <= -0.5",
+            "r.v <= 'b'",
+        ):
+            tpl = "{% for r in rows %}{% if " + cond + " %}Y{% elif r.v %}{{ r.v }}{% else %}N{% endif %},{% endfor %}"
+            _m(stock, cyth, tpl, {"rows": rows})
+
+    def test_text_slots_between_fallbacks(self, stock, cyth):
+        """Text slots stay in place when neighbouring LOOPATTR slots fall back."""
+        tpl = (
+            "{% for r in rows %}<{{ r.a }}|{{ r.b|upper }}|{% cycle 'x' 'y' as c %}"
+            "{% if r.a %}A{% endif %}{{ c }}>{% endfor %}"
+        )
+        _m(stock, cyth, tpl, {"rows": [{"a": 1, "b": "q"}, {}, {"b": "z"}, {"a": 0}]})
+
+    def test_runtime_built_loopvar_names(self, stock, cyth):
+        """Loop variable names built at runtime still match their references."""
+        name = "".join(["ro", "w_", str(len(stock.__class__.__name__))])
+        tpl = (
+            "{% for " + name + " in rows %}{{ " + name + ".a }}{% if " + name + ".a == 1 %}!{% endif %}"
+            "{{ other }}{{ " + name + " }}{% endfor %}"
+        )
+        _m(stock, cyth, tpl, {"rows": [{"a": 1}, {"a": 2}], "other": "o"})
+
+    def test_equal_but_not_identical_loopvar_names(self, cyth):
+        """Loop variables and lookups replaced after parsing match by equality, not only identity."""
+        ctx = {"x": "OUTER", "xs": [{"a": 1}, {"a": 2}]}
+        tpl = cyth.from_string("{% for x in xs %}{{ x.a }},{% endfor %}")
+        tpl.template.nodelist[0].loopvars = [str(bytearray(b"x"), "ascii")]
+        assert tpl.render(ctx) == "1,2,"
+
+        tpl = cyth.from_string("{% for x in xs %}{{ x }},{% endfor %}")
+        var = tpl.template.nodelist[0].nodelist_loop[0].filter_expression.var
+        var.lookups = (str(bytearray(b"x"), "ascii"),)
+        assert tpl.render({"x": "OUTER", "xs": ["p", "q"]}) == "p,q,"
+
+    def test_captured_context_keeps_loop_scope(self, stock, cyth):
+        """A context copied inside the loop still sees the loop variable after the render."""
+        tpl = "{% load custom_tags %}{% for x in xs %}{% capture_context sink %}{{ x }}{% endfor %}"
+        for engine in (stock, cyth):
+            sink = []
+            assert engine.from_string(tpl).render({"xs": ["p", "q"], "sink": sink}) == "pq"
+            assert [c["x"] for c in sink] == ["q", "q"]
+
+    def test_dict_rows_missing_key_fall_back_to_attributes(self, stock, cyth):
+        """A dict row without the key resolves the attribute (e.g. dict.items) like Django."""
+        rows = [{"a": 1}, {"items": "own"}, {}]
+        for tpl in (
+            "{% for r in rows %}[{% if r.items %}Y{% else %}N{% endif %}]{% endfor %}",
+            "{% for r in rows %}[{% if r.items %}Y{% endif %}{% if r.keys == 1 %}K{% elif r.a %}A{% endif %}]{% endfor %}",
+            "{% for r in rows %}[{{ r.values }}|{{ r.items|length }}]{% endfor %}",
+        ):
+            _m(stock, cyth, tpl, {"rows": rows})
+
+    def test_loopif_static_multi_node_branches(self, stock, cyth):
+        """Branches of text split by comments, and empty branches, inside loops."""
+        rows = [{"a": 1, "b": 2}, {"a": 0, "b": 1}, {}]
+        for tpl in (
+            "{% for r in rows %}{% if r.a %}<td>{# c #}yes{% comment %}x{% endcomment %}</td>{% else %}{% endif %}{% endfor %}",
+            "{% for r in rows %}{% if r.a == 1 %}{% elif r.b %}b{# c #}!{% else %}-{% endif %}{% endfor %}",
+            "{% for r in rows %}{% if flag %}A{# c #}B{% else %}{{ r.a }}{% endif %}{% endfor %}",
+        ):
+            for flag in (True, False):
+                _m(stock, cyth, tpl, {"rows": rows, "flag": flag})
+
+    def test_mixed_item_types_in_loop(self, stock, cyth):
+        """LOOPATTR/LOOPIF on rows of differing types, with and without __getitem__."""
+        from types import SimpleNamespace
+
+        class AttrDict(dict):
+            name = "attr"
+
+        items = [
+            SimpleNamespace(name="ns1"),
+            SimpleNamespace(name="ns2"),
+            AttrDict(name="key"),
+            AttrDict(),
+            ("t",),
+            list,
+            SimpleNamespace(),
+            {"name": "d"},
+        ]
+        for tpl in (
+            "{% for item in items %}[{{ item.name }}]{% endfor %}",
+            "{% for item in items %}[{{ item.name|upper }}]{% endfor %}",
+            "{% for item in items %}{% if item.name %}Y{% else %}N{% endif %}{% endfor %}",
+            "{% for item in items %}{% if item.name == 'ns2' %}A{% elif item.other %}B{% endif %}{% endfor %}",
+        ):
+            _m(stock, cyth, tpl, {"items": items})
+
     def test_dict_missing_key_in_loop_with_filter(self, stock, cyth):
         """Dict missing key when filter applied — LOOPATTR_FILTER path."""
         _m(
@@ -1753,6 +2136,79 @@ class TestUseThousandSeparator:
         finally:
             fmt._use_thousand_sep = old_val
 
+    @pytest.mark.parametrize("lang", ["en", "de", "fr", "hi"])
+    @override_settings(USE_THOUSAND_SEPARATOR=True, USE_L10N=True)
+    def test_int_grouping_edge_values(self, stock, cyth, lang):
+        """Grouped ints across locales, including values outside the C long long range."""
+        from django.utils import translation
+
+        import django_templates_cythonized.formats as fmt
+
+        old_val = fmt._use_thousand_sep
+        fmt._use_thousand_sep = None
+        try:
+            with translation.override(lang):
+                _m(
+                    stock,
+                    cyth,
+                    "{% for v in vals %}{{ v }}|{% endfor %}",
+                    {"vals": [0, 7, -7, 999, 1000, -1000, 123456789, -987654, 2**63 - 1, -(2**63), 2**63, 10**25]},
+                )
+        finally:
+            fmt._use_thousand_sep = old_val
+
+    def test_settings_changes_reach_cached_formats(self, stock, cyth):
+        """The cached separator flag and formats follow override_settings without manual resets."""
+        tpl = "{{ val }}|{{ f }}"
+        ctx = {"val": 1234567, "f": 1234567.5}
+        _m(stock, cyth, tpl, ctx)
+        with override_settings(USE_THOUSAND_SEPARATOR=True):
+            _m(stock, cyth, tpl, ctx)
+            with override_settings(USE_I18N=False, NUMBER_GROUPING=2, THOUSAND_SEPARATOR="_", DECIMAL_SEPARATOR=","):
+                _m(stock, cyth, tpl, ctx)
+            _m(stock, cyth, tpl, ctx)
+        _m(stock, cyth, tpl, ctx)
+
+    def test_number_format_cache_is_bounded(self):
+        """Unknown language codes fall back to settings and don't grow the cache without limit."""
+        import django_templates_cythonized.formats as fmt
+
+        expected = fmt.number_format(1234567, 2, True, True, "x-0")
+        for i in range(200):
+            assert fmt.number_format(1234567, 2, True, True, f"x-{i}") == expected
+        assert len(fmt._number_format_cache) <= 64
+
+    @pytest.mark.parametrize("lang", ["en", "de", "fr", "hi"])
+    @override_settings(USE_THOUSAND_SEPARATOR=True, USE_L10N=True)
+    def test_decimal_and_float_grouping(self, stock, cyth, lang):
+        import decimal
+
+        from django.utils import translation
+
+        import django_templates_cythonized.formats as fmt
+
+        old_val = fmt._use_thousand_sep
+        fmt._use_thousand_sep = None
+        try:
+            with translation.override(lang):
+                _m(
+                    stock,
+                    cyth,
+                    "{% for v in vals %}{{ v }}|{{ v|floatformat:2 }}|{% endfor %}",
+                    {
+                        "vals": [
+                            decimal.Decimal("1234567.891"),
+                            decimal.Decimal("-98765.4"),
+                            decimal.Decimal(12),
+                            1234567.5,
+                            -0.25,
+                            1e20,
+                        ]
+                    },
+                )
+        finally:
+            fmt._use_thousand_sep = old_val
+
 
 # ---------------------------------------------------------------------------
 # Production-readiness tests — critical features, regression tests for bug fixes
@@ -2026,6 +2482,13 @@ class TestCsrfToken:
         """{% csrf_token %} should produce identical output."""
         _m(stock, cyth, "{% csrf_token %}", {"csrf_token": "abc123"})
 
+    def test_csrf_token_needing_escape(self, stock, cyth):
+        """Non-alphanumeric or lazy tokens render exactly like stock."""
+        _m(stock, cyth, "{% csrf_token %}", {"csrf_token": 'a"<b>&'})
+        _m(stock, cyth, "{% csrf_token %}", {"csrf_token": mark_safe("<b>")})
+        _m(stock, cyth, "{% csrf_token %}", {"csrf_token": lazy(lambda: "tok3n", str)()})
+        _m(stock, cyth, "{% csrf_token %}", {"csrf_token": "t\u00f6ken"})
+
     def test_csrf_token_missing(self, stock, cyth):
         """{% csrf_token %} with no csrf_token in context should match stock."""
         _m(stock, cyth, "{% csrf_token %}", {})
@@ -2049,6 +2512,43 @@ class TestUrlTag:
         """{% url 'home' as link %} should resolve identically."""
         _m(stock, cyth, "{% url 'home' as link %}[{{ link }}]")
 
+    @override_settings(ROOT_URLCONF="tests.urls")
+    def test_url_repeated_with_varying_args(self, stock, cyth):
+        """Cached reversals must key on the argument values and their types."""
+        tpl = "{% for pk in pks %}{% url 'detail' pk as link %}[{{ link }}]{% endfor %}"
+        _m(stock, cyth, tpl, {"pks": [1, 2, 1, "3", True, 1.0, 1]})
+
+    @override_settings(ROOT_URLCONF="tests.urls")
+    def test_url_follows_script_prefix(self, stock, cyth):
+        from django.urls import get_script_prefix, set_script_prefix
+
+        old_prefix = get_script_prefix()
+        try:
+            for prefix in ("/", "/app/", "/"):
+                set_script_prefix(prefix)
+                _m(stock, cyth, "{% url 'detail' 7 %}")
+        finally:
+            set_script_prefix(old_prefix)
+
+    @override_settings(ROOT_URLCONF="tests.urls")
+    def test_url_follows_clear_url_caches(self, stock, cyth, monkeypatch):
+        """Changed urlpatterns are picked up once clear_url_caches() is called."""
+        from django.http import HttpResponse
+        from django.urls import clear_url_caches, path
+
+        import tests.urls
+
+        _m(stock, cyth, "{% url 'home' %}")
+        monkeypatch.setattr(tests.urls, "urlpatterns", [path("moved/", lambda r: HttpResponse(), name="home")])
+        clear_url_caches()
+        try:
+            _m(stock, cyth, "{% url 'home' %}")
+            assert cyth.from_string("{% url 'home' %}").render({}) == "/moved/"
+        finally:
+            monkeypatch.undo()
+            clear_url_caches()
+        _m(stock, cyth, "{% url 'home' %}")
+
 
 class TestWithTag:
     """Tests for {% with %} legacy and modern syntax."""
@@ -2094,6 +2594,15 @@ class TestForLoopEdgeCases:
         """Empty list renders empty nodelist."""
         _m(stock, cyth, "{% for x in items %}{{ x }}{% empty %}EMPTY{% endfor %}", {"items": []})
 
+    def test_loop_empty_branch_scoping(self, stock, cyth):
+        """Writes inside {% empty %} stay scoped to the loop; text-only branches match too."""
+        for tpl in (
+            "{% for x in items %}{{ x }}{% empty %}{% firstof 'a' as v %}[{{ v }}]{% endfor %}({{ v }})",
+            "{% for x in items %}{{ x }}{% empty %}none{% endfor %}{% for x in items %}{% endfor %}|",
+            "{% for x in missing %}{{ x }}{% endfor %}|{{ x }}",
+        ):
+            _m(stock, cyth, tpl, {"items": [], "v": "outer"})
+
     def test_loop_reversed(self, stock, cyth):
         """{% for x in items reversed %} iterates in reverse."""
         _m(stock, cyth, "{% for x in items reversed %}{{ x }},{% endfor %}", {"items": [1, 2, 3]})
@@ -2891,6 +3400,30 @@ class TestQuerystringTag:
             {"tag_list": ["a", None, "b"]},
         )
 
+    def test_positional_mapping_types(self, stock, cyth):
+        from collections import OrderedDict
+        from types import MappingProxyType
+
+        from django.template import TemplateSyntaxError as DjangoTemplateSyntaxError
+
+        ctx = {"od": OrderedDict(a=1), "mp": MappingProxyType({"b": 2})}
+        self._qs(stock, cyth, "{% querystring od mp c=3 %}", RequestFactory().get("/"), ctx)
+        for engine in (stock, cyth):
+            with pytest.raises(DjangoTemplateSyntaxError, match="requires mappings"):
+                engine.from_string("{% querystring items %}").render(
+                    {"items": [1, 2], "request": RequestFactory().get("/")}
+                )
+
+    def test_value_types(self, stock, cyth):
+        """Strings stay single values; other iterables become lists."""
+        self._qs(
+            stock,
+            cyth,
+            "{% querystring a=s b=t c=g d=n e=r %}",
+            RequestFactory().get("/"),
+            {"s": "xy", "t": ("p", None), "g": frozenset(["q"]), "n": 5, "r": range(2)},
+        )
+
 
 # ---------------------------------------------------------------------------
 # Template exceptions (from Django's test_exceptions.py)
@@ -2929,6 +3462,17 @@ class TestLoadTag:
         with pytest.raises(TemplateSyntaxError):
             cyth.from_string("{% load nonexistent_lib %}")
 
+    def test_load_from_library(self, stock, cyth):
+        tpl = "{% load greeting from custom_tags %}{% greeting 'World' %}"
+        _m(stock, cyth, tpl)
+
+    def test_load_missing_name_from_library(self, stock, cyth):
+        from django.template import TemplateSyntaxError as DjangoTemplateSyntaxError
+
+        for engine in (stock, cyth):
+            with pytest.raises(DjangoTemplateSyntaxError, match="'nope' is not a valid tag or filter"):
+                engine.from_string("{% load greeting nope from custom_tags %}")
+
     def test_load_builtin(self, stock, cyth):
         """Loading a lib that's already builtin should work."""
         _m(stock, cyth, "{% load cache %}{% cache 300 k %}ok{% endcache %}")
@@ -2993,6 +3537,21 @@ class TestExceptionPropagation:
         with pytest.raises(TemplateSyntaxError, match="Empty block tag"):
             cyth.from_string("{% %}")
 
+    def test_loop_body_shrinking_its_list(self, stock, cyth):
+        """A loop body that pops from the list being looped over stops like Django's iterator."""
+        for src in (
+            "{% for x in items %}{{ x }}{{ items.pop }}{% endfor %}",
+            "{% for x in items reversed %}{{ x }}{{ items.pop }}{% endfor %}",
+            "{% for x in items %}{{ x.a }}{{ items.pop.a }}{% endfor %}",
+            "{% for x in items reversed %}{{ x.a }}{{ items.pop.a }}{% endfor %}",
+            "{% for x in items %}{% if x %}{{ x }}{% endif %}{{ items.pop }}{% endfor %}",
+            "{% for x in items reversed %}{% if x %}{{ x }}{% endif %}{{ items.pop }}{% endfor %}",
+        ):
+            rows = [{"a": 1}, {"a": 2}, {"a": 3}, {"a": 4}] if ".a" in src else [1, 2, 3, 4]
+            # The body mutates the list, so each engine gets its own copy.
+            expected = stock.from_string(src).render({"items": list(rows)})
+            assert cyth.from_string(src).render({"items": list(rows)}) == expected, src
+
     def test_method_raises_non_silent(self, stock, cyth):
         """{{ var.method }} where method raises non-silent exception must propagate."""
         with pytest.raises(_NoisyException):
@@ -3357,27 +3916,48 @@ class TestFormRendererLangCache:
     """CythonizedFormRenderer must reset _lang between renders."""
 
     def test_lang_reset_between_renders(self):
-        from django_templates_cythonized.backend import CythonizedFormRenderer, _form_ctx_local
+        from django_templates_cythonized.backend import CythonizedFormRenderer, _render_ctx_local
 
         renderer = CythonizedFormRenderer()
+        widget_ctx = {
+            "widget": {
+                "name": "test",
+                "is_hidden": False,
+                "required": False,
+                "value": "",
+                "attrs": {"id": "id_test"},
+                "template_name": "django/forms/widgets/text.html",
+            },
+        }
+        renderer.render("django/forms/widgets/text.html", widget_ctx)
 
-        ctx = getattr(_form_ctx_local, "ctx", None)
-        if ctx is not None:
-            ctx._lang = "stale-xx"
-            renderer.render(
-                "django/forms/widgets/text.html",
-                {
-                    "widget": {
-                        "name": "test",
-                        "is_hidden": False,
-                        "required": False,
-                        "value": "",
-                        "attrs": {"id": "id_test"},
-                        "template_name": "django/forms/widgets/text.html",
-                    },
-                },
-            )
-            assert ctx._lang != "stale-xx", "_lang was not reset between renders — stale language cache"
+        ctx = _render_ctx_local.pool[-1]
+        ctx._lang = "stale-xx"
+        renderer.render("django/forms/widgets/text.html", widget_ctx)
+        assert ctx._lang != "stale-xx", "_lang was not reset between renders — stale language cache"
+
+    def test_autoescape_follows_engine(self):
+        from django_templates_cythonized.backend import CythonizedFormRenderer
+
+        renderer = CythonizedFormRenderer()
+        renderer.engine = _make_backend(autoescape=False)
+        assert renderer.render("basic.txt", {"user": "<b>"}) == "Hello <b>!"
+        escaped = CythonizedFormRenderer().render("django/forms/widgets/input.html", {"widget": {"type": "<"}})
+        assert 'type="&lt;"' in escaped
+
+    def test_nested_render_is_isolated(self):
+        from django_templates_cythonized.backend import CythonizedFormRenderer
+
+        renderer = CythonizedFormRenderer()
+        backend = renderer.engine
+        renderer._tpl_cache["outer.html"] = backend.from_string("{{ outer }}{{ inner }}").template
+        renderer._tpl_cache["inner.html"] = backend.from_string("[{{ outer }}]").template
+
+        class Inner:
+            def __str__(self):
+                return renderer.render("inner.html", {})
+
+        assert renderer.render("outer.html", {"outer": "O", "inner": Inner()}) == "O[]"
 
 
 # ---------------------------------------------------------------------------
@@ -3829,3 +4409,447 @@ class TestForLoopVariableScoping:
             "{% for x in items %}{% if show %}{{ x }}{% endif %}{% endfor %}",
             {"items": [1, 2, 3], "show": False},
         )
+
+
+# ===========================================================================
+# BACKEND TEMPLATE CACHE
+# ===========================================================================
+
+
+def _make_backend(**options):
+    from django_templates_cythonized.backend import CythonizedTemplates
+
+    return CythonizedTemplates(
+        {"NAME": "cache_test", "DIRS": [TEMPLATES_DIR], "APP_DIRS": False, "OPTIONS": options},
+    )
+
+
+class TestBackendTemplateCache:
+    """CythonizedTemplates.get_template caches wrappers in a bounded LRU."""
+
+    def test_cache_hit_returns_same_wrapper(self):
+        backend = _make_backend()
+        assert backend.get_template("basic.txt") is backend.get_template("basic.txt")
+
+    def test_cached_names_are_interned(self):
+        import sys
+
+        backend = _make_backend()
+        name = str(bytearray(b"basic.txt"), "ascii")
+        backend.get_template(name)
+        (key,) = backend._template_cache
+        assert key is sys.intern("basic.txt")
+
+    def test_evicted_but_referenced_wrapper_is_reused(self, monkeypatch):
+        import django_templates_cythonized.backend as backend_module
+
+        monkeypatch.setattr(backend_module, "TEMPLATE_CACHE_SIZE", 1)
+        backend = _make_backend()
+        held = backend.get_template("basic.txt")
+        backend.get_template("base.html")
+        assert "basic.txt" not in backend._template_cache
+        assert backend.get_template("basic.txt") is held
+
+    def test_get_template_is_the_caching_override(self):
+        from django_templates_cythonized.backend import CythonizedTemplates
+
+        assert CythonizedTemplates.get_template.__qualname__.startswith("CythonizedTemplates")
+        backend = _make_backend()
+        backend.get_template("basic.txt")
+        assert "basic.txt" in backend._template_cache
+
+    def test_cache_is_bounded(self, monkeypatch):
+        from django_templates_cythonized import backend as backend_module
+
+        monkeypatch.setattr(backend_module, "TEMPLATE_CACHE_SIZE", 2)
+        backend = _make_backend()
+        backend.get_template("basic.txt")
+        backend.get_template("include_target.html")
+        backend.get_template("include_simple.html")
+        assert list(backend._template_cache) == ["include_target.html", "include_simple.html"]
+
+    def test_cache_evicts_least_recently_used(self, monkeypatch):
+        from django_templates_cythonized import backend as backend_module
+
+        monkeypatch.setattr(backend_module, "TEMPLATE_CACHE_SIZE", 2)
+        backend = _make_backend()
+        backend.get_template("basic.txt")
+        backend.get_template("include_target.html")
+        backend.get_template("basic.txt")  # bump recency
+        backend.get_template("include_simple.html")
+        assert list(backend._template_cache) == ["basic.txt", "include_simple.html"]
+
+    def test_missing_template_not_cached(self):
+        from django.template import TemplateDoesNotExist
+
+        backend = _make_backend()
+        with pytest.raises(TemplateDoesNotExist):
+            backend.get_template("does_not_exist.html")
+        assert "does_not_exist.html" not in backend._template_cache
+
+
+class _RendersTemplate:
+    """Value whose __str__ renders another template on the same thread."""
+
+    def __init__(self, engine, source):
+        self.engine = engine
+        self.source = source
+
+    def __str__(self):
+        return self.engine.from_string(self.source).render({})
+
+
+class TestBackendContextPool:
+    """Request-less renders reuse a per-thread Context without leaking state."""
+
+    def test_variables_do_not_leak_between_renders(self, cyth):
+        cyth.from_string("{{ a }}").render({"a": "first"})
+        assert cyth.from_string("[{{ a }}]").render({}) == "[]"
+
+    def test_writes_without_context_do_not_leak(self, cyth):
+        cyth.from_string("{% cycle 'x' 'y' as c %}").render()
+        assert cyth.from_string("[{{ c }}]").render() == "[]"
+
+    def test_nested_render_gets_isolated_context(self, stock, cyth):
+        for engine in (stock, cyth):
+            inner = _RendersTemplate(engine, "[{{ outer }}]")
+            result = engine.from_string("{{ outer }}{{ inner }}").render({"outer": "O", "inner": inner})
+            assert result == "O[]"
+
+    def test_autoescape_follows_engine(self):
+        backend = _make_backend(autoescape=False)
+        assert backend.from_string("{{ v }}").render({"v": "<b>"}) == "<b>"
+        assert _make_backend().from_string("{{ v }}").render({"v": "<b>"}) == "&lt;b&gt;"
+
+    def test_failed_render_does_not_leak_scopes(self, cyth):
+        class Boom:
+            def __str__(self):
+                raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            cyth.from_string("{% for a, b in items %}{{ boom }}{% endfor %}").render(
+                {"items": [("x", "y")], "boom": Boom()}
+            )
+        assert cyth.from_string("[{{ a }}{{ b }}]").render({}) == "[]"
+
+    def test_dict_subclass_context_matches_stock(self, stock, cyth):
+        from collections import OrderedDict, defaultdict
+
+        for ctx in (OrderedDict(a="x"), defaultdict(str, a="x")):
+            assert cyth.from_string("[{{ a }}{{ b }}]").render(ctx) == stock.from_string("[{{ a }}{{ b }}]").render(ctx)
+
+    def test_non_dict_context_raises(self, stock, cyth):
+        for engine in (stock, cyth):
+            with pytest.raises(TypeError):
+                engine.from_string("{{ a }}").render([("a", 1)])
+
+    def test_push_and_pop_scope(self):
+        from django_templates_cythonized.context import Context
+
+        ctx = Context({"a": 1})
+        scope = {"a": 2}
+        ctx.push_scope(scope)
+        assert ctx.dicts[-1] is scope
+        assert ctx["a"] == 2
+        ctx.pop_scope()
+        assert ctx["a"] == 1
+
+
+class TestBackendTemplateCall:
+    def test_call_matches_render(self, cyth):
+        tpl = cyth.from_string("{{ a }}|{{ b }}")
+        assert tpl({"a": 1, "b": "<x>"}) == tpl.render({"a": 1, "b": "<x>"}) == "1|&lt;x&gt;"
+        assert tpl() == tpl.render() == "|"
+
+    def test_simple_template_response_renders(self, stock, cyth):
+        from django_templates_cythonized.response import SimpleTemplateResponse
+
+        for engine in (stock, cyth):
+            response = SimpleTemplateResponse(engine.from_string("<p>{{ a }}</p>"), {"a": "x"})
+            response.render()
+            assert response.content == b"<p>x</p>"
+
+
+class TestFilesystemLoaderDecoding:
+    """Templates read as bytes + codec decode must match text-mode reads."""
+
+    def _render_both(self, tmp_path, name, context, **kwargs):
+        from django.template import Context as StockContext
+        from django.template.engine import Engine as StockEngine
+
+        from django_templates_cythonized.context import Context
+        from django_templates_cythonized.engine import Engine
+
+        return [
+            engine_cls(dirs=[str(tmp_path)], **kwargs).get_template(name).render(context_cls(context))
+            for engine_cls, context_cls in ((StockEngine, StockContext), (Engine, Context))
+        ]
+
+    def test_newlines_are_translated(self, tmp_path):
+        (tmp_path / "nl.html").write_bytes(b"a\r\nb\rc\n{{ x }}\r\n")
+        assert self._render_both(tmp_path, "nl.html", {"x": 1}) == ["a\nb\nc\n1\n"] * 2
+
+    def test_file_charset_is_respected(self, tmp_path):
+        (tmp_path / "latin.html").write_bytes("caf\xe9 {{ x }}".encode("latin-1"))
+        assert self._render_both(tmp_path, "latin.html", {"x": 1}, file_charset="latin-1") == ["caf\xe9 1"] * 2
+
+
+class TestBackendFragmentCache:
+    @pytest.fixture(autouse=True)
+    def _clear_cache(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        yield
+        cache.clear()
+
+    def test_cached_output_is_reused(self, cyth):
+        tpl = cyth.from_string("<{{ v }}>")
+        assert tpl.render({"v": "a&", "_fragment_cache": "frag"}) == "<a&amp;>"
+        assert tpl.render({"v": "b", "_fragment_cache": "frag"}) == "<a&amp;>"
+        assert tpl.render({"v": "b", "_fragment_cache": "other"}) == "<b>"
+
+    def test_timeout_tuple(self, cyth):
+        from django.core.cache import cache
+
+        tpl = cyth.from_string("{{ v }}")
+        assert tpl.render({"v": "a", "_fragment_cache": ("frag", 0)}) == "a"
+        assert cache.get("frag") is None
+        assert tpl.render({"v": "b", "_fragment_cache": ("frag", 0)}) == "b"
+
+    def test_no_key_no_caching(self, cyth):
+        tpl = cyth.from_string("{{ v }}")
+        assert tpl.render({"v": "a"}) == "a"
+        assert tpl.render({"v": "b"}) == "b"
+
+    def test_keys_are_namespaced_per_template(self, cyth):
+        from django.core.cache import cache
+
+        cache.set("frag", "unrelated entry")
+        one = cyth.from_string("1:{{ v }}")
+        two = cyth.from_string("2:{{ v }}")
+        assert one.render({"v": "a", "_fragment_cache": "frag"}) == "1:a"
+        assert two.render({"v": "b", "_fragment_cache": "frag"}) == "2:b"
+        assert one.render({"v": "c", "_fragment_cache": "frag"}) == "1:a"
+        assert cache.get("frag") == "unrelated entry"
+
+    def test_file_templates_are_namespaced_by_origin(self):
+        backend = _make_backend()
+        base = backend.get_template("base.html").render({"_fragment_cache": "page"})
+        child = backend.get_template("child.html").render({"_fragment_cache": "page"})
+        assert base != child
+
+    @staticmethod
+    def _capture_contexts(tpl):
+        seen = []
+        inner = tpl.template
+
+        class Recorder:
+            origin = inner.origin
+            source = inner.source
+
+            def render(self, context):
+                seen.append("_fragment_cache" in context)
+                return inner.render(context)
+
+        tpl.template = Recorder()
+        return seen
+
+    def test_key_is_removed_from_context(self, cyth):
+        tpl = cyth.from_string("{{ v }}")
+        seen = self._capture_contexts(tpl)
+        assert tpl.render({"v": "a", "_fragment_cache": "frag"}) == "a"
+        assert seen == [False]
+
+    def test_request_renders_are_not_cached(self, cyth):
+        tpl = cyth.from_string("{{ v }}")
+        seen = self._capture_contexts(tpl)
+        request = RequestFactory().get("/")
+        assert tpl.render({"v": "a", "_fragment_cache": "frag"}, request) == "a"
+        assert tpl.render({"v": "b", "_fragment_cache": "frag"}, request) == "b"
+        assert seen == [False, False]
+
+
+class TestBackendInit:
+    def test_params_are_not_mutated(self):
+        from django_templates_cythonized.backend import CythonizedTemplates
+
+        options = {"autoescape": False}
+        params = {"NAME": "init_test", "DIRS": [TEMPLATES_DIR], "APP_DIRS": False, "OPTIONS": options}
+        backend = CythonizedTemplates(params)
+        assert params == {"NAME": "init_test", "DIRS": [TEMPLATES_DIR], "APP_DIRS": False, "OPTIONS": options}
+        assert options == {"autoescape": False}
+        assert backend.engine.autoescape is False
+        assert backend.dirs == [TEMPLATES_DIR]
+
+
+class TestBackendLibraries:
+    def test_library_names_are_interned(self):
+        import sys
+
+        backend = _make_backend(libraries={"custom_filters": "tests.templatetags.custom_filters"})
+        for name in backend.engine.template_libraries:
+            assert sys.intern(name) is name
+        assert "custom_filters" in backend.engine.template_libraries
+
+
+# ===========================================================================
+# FORM RENDERER
+# ===========================================================================
+
+
+class TestFormRenderer:
+    """CythonizedFormRenderer output must match Django's DjangoTemplates renderer."""
+
+    def _renderers(self):
+        from django.forms.renderers import DjangoTemplates as StockRenderer
+
+        from django_templates_cythonized.backend import CythonizedFormRenderer
+
+        return StockRenderer(), CythonizedFormRenderer()
+
+    def test_widget_render_matches_stock(self):
+        from django import forms
+
+        stock_renderer, cyth_renderer = self._renderers()
+        widget = forms.TextInput(attrs={"class": "x"})
+        for value in ("plain", "<b>&</b>", None):
+            expected = widget.render("name", value, renderer=stock_renderer)
+            assert widget.render("name", value, renderer=cyth_renderer) == expected
+
+    def test_select_render_matches_stock(self):
+        from django import forms
+
+        stock_renderer, cyth_renderer = self._renderers()
+        widget = forms.Select(choices=[("a", "A"), ("b", "<B>")])
+        expected = widget.render("sel", "b", renderer=stock_renderer)
+        assert widget.render("sel", "b", renderer=cyth_renderer) == expected
+
+    def test_form_render_matches_stock(self):
+        from django import forms
+
+        class _Form(forms.Form):
+            name = forms.CharField(help_text="<i>help</i>")
+            agree = forms.BooleanField(required=False)
+
+        stock_renderer, cyth_renderer = self._renderers()
+        form = _Form(data={"name": ""})
+        expected = form.render(renderer=stock_renderer)
+        assert form.render(renderer=cyth_renderer) == expected
+
+    def test_output_is_stripped(self):
+        from django_templates_cythonized.backend import CythonizedFormRenderer
+
+        renderer = CythonizedFormRenderer()
+        widget_ctx = {
+            "widget": {
+                "name": "n",
+                "is_hidden": False,
+                "required": False,
+                "value": "v",
+                "attrs": {},
+                "template_name": "django/forms/widgets/text.html",
+                "type": "text",
+            },
+        }
+        result = renderer.render("django/forms/widgets/text.html", widget_ctx)
+        assert result == result.strip()
+        assert result.startswith("<input")
+
+
+class TestBackendPrewarm:
+    def test_prewarm_discovers_and_caches_templates(self):
+        backend = _make_backend()
+        warmed = backend.prewarm()
+        assert "base.html" in warmed
+        assert "child.html" in warmed
+        assert "basic.txt" not in warmed
+        for name in warmed:
+            assert name in backend._template_cache
+
+    def test_prewarm_explicit_names_skips_missing(self):
+        backend = _make_backend()
+        assert backend.prewarm(["basic.txt", "missing.html"]) == ["basic.txt"]
+        assert "basic.txt" in backend._template_cache
+
+    def test_prewarm_discovery_skips_invalid_templates(self, tmp_path, caplog):
+        from django.template import TemplateSyntaxError as DjangoTemplateSyntaxError
+
+        from django_templates_cythonized.backend import CythonizedTemplates
+
+        (tmp_path / "good.html").write_text("{{ x }}")
+        (tmp_path / "not_django.html").write_text("{% if %}")
+        (tmp_path / "unknown_lib.html").write_text("{% load no_such_library %}")
+        backend = CythonizedTemplates({"NAME": "prewarm_test", "DIRS": [tmp_path], "APP_DIRS": False, "OPTIONS": {}})
+        with caplog.at_level("WARNING", logger="django.template"):
+            assert backend.prewarm() == ["good.html"]
+        assert "not_django.html" in caplog.text
+        assert "unknown_lib.html" in caplog.text
+        with pytest.raises(DjangoTemplateSyntaxError):
+            backend.prewarm(["not_django.html"])
+
+
+# ===========================================================================
+# DEBUG TAG
+# ===========================================================================
+
+
+class TestDebugTag:
+    def test_debug_off(self, stock, cyth):
+        _m(stock, cyth, "[{% debug %}]", {"a": 1})
+
+    @override_settings(DEBUG=True)
+    def test_debug_context_dump(self, stock, cyth):
+        ctx = {"a": 1, "b": "<x>"}
+        s_out = stock.from_string("{% debug %}").render(ctx)
+        c_out = cyth.from_string("{% debug %}").render(ctx)
+        # Everything before the sys.modules dump is deterministic.
+        assert c_out.split("\n\n", 1)[0] == s_out.split("\n\n", 1)[0]
+        assert "&lt;x&gt;" in c_out
+        assert "sys" in c_out.split("\n\n", 1)[1]
+
+
+# ===========================================================================
+# PARTIAL TAGS
+# ===========================================================================
+
+
+class TestPartialTags:
+    def test_partial_reused(self, stock, cyth):
+        tpl = (
+            "{% partialdef row %}<{{ item }}>{% endpartialdef %}"
+            "{% for item in items %}{% partial row %}{% endfor %}|{% partial row %}"
+        )
+        _m(stock, cyth, tpl, {"items": [1, 2, 3], "item": "x"})
+
+    def test_partial_inline(self, stock, cyth):
+        _m(stock, cyth, "{% partialdef p inline %}[{{ a }}]{% endpartialdef %}-{% partial p %}", {"a": 1})
+
+    def test_partial_undefined(self, stock, cyth):
+        from django.template import TemplateSyntaxError as DjangoTemplateSyntaxError
+
+        for engine in (stock, cyth):
+            with pytest.raises(DjangoTemplateSyntaxError, match="Partial 'nope' is not defined"):
+                engine.from_string("{% partial nope %}").render({})
+
+
+# ===========================================================================
+# LOREM TAG
+# ===========================================================================
+
+
+class TestLoremTag:
+    def test_common_forms(self, stock, cyth):
+        for tpl in ("{% lorem %}", "{% lorem 3 w %}", "{% lorem 1 p %}", "{% lorem 1 b %}", "{% lorem n w %}"):
+            _m(stock, cyth, tpl, {"n": 4})
+
+    def test_random_word_count(self, cyth):
+        out = cyth.from_string("{% lorem 5 w random %}").render({})
+        assert len(out.split()) == 5
+
+    def test_bad_format(self, stock, cyth):
+        from django.template import TemplateSyntaxError as DjangoTemplateSyntaxError
+
+        for engine in (stock, cyth):
+            with pytest.raises(DjangoTemplateSyntaxError, match="Incorrect format"):
+                engine.from_string("{% lorem 1 2 w %}")